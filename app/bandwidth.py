@@ -0,0 +1,134 @@
+import glob
+import os
+import threading
+import time
+
+# Ráfaga máxima acumulable por descarga, en segundos de su tasa asignada
+BURST_SECONDS = 0.5
+# Espera máxima por llamada, para que un cambio de límite se note enseguida
+MAX_WAIT = 0.5
+
+
+class _Bucket:
+    def __init__(self, cap):
+        self.cap = cap # Límite propio en bytes/s (None = sin límite)
+        self.rate = None # Tasa efectiva asignada por el reparto
+        self.tokens = 0.0
+        self.last = time.monotonic()
+
+    def refill(self, now):
+        if self.rate:
+            self.tokens = min(self.rate * BURST_SECONDS, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+
+class BandwidthScheduler:
+    """Reparte el ancho de banda entre las descargas activas con un cubo de tokens por trabajo.
+
+    El límite global se divide a partes iguales entre los trabajos activos; lo que
+    no usa un trabajo con límite propio más bajo se reparte entre los demás. Los
+    límites se pueden cambiar en caliente y se expresan en bytes/s (None = sin límite).
+    """
+
+    def __init__(self, global_limit=None, job_limit=None):
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self.global_limit = global_limit
+        self.job_limit = job_limit
+
+    def register(self, job_id, limit=None):
+        with self._lock:
+            self._jobs[job_id] = _Bucket(limit)
+            self._rebalance()
+
+    def unregister(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+            self._rebalance()
+
+    def set_limits(self, global_limit, job_limit):
+        with self._lock:
+            self.global_limit = global_limit or None
+            self.job_limit = job_limit or None
+            self._rebalance()
+
+    def set_job_limit(self, job_id, limit):
+        with self._lock:
+            bucket = self._jobs.get(job_id)
+            if bucket:
+                bucket.cap = limit or None
+                self._rebalance()
+
+    def _rebalance(self):
+        now = time.monotonic()
+        caps = []
+        for job_id, bucket in self._jobs.items():
+            bucket.refill(now)
+            limits = [c for c in (bucket.cap, self.job_limit) if c]
+            caps.append((min(limits) if limits else None, job_id))
+
+        remaining = self.global_limit
+        # Reparto equitativo (water-filling): primero los trabajos con menor límite
+        caps.sort(key=lambda c: float('inf') if c[0] is None else c[0])
+        for n, (cap, job_id) in enumerate(caps):
+            if remaining is None:
+                rate = cap
+            else:
+                share = remaining / (len(caps) - n)
+                rate = share if cap is None else min(cap, share)
+                remaining -= rate
+            bucket = self._jobs[job_id]
+            if not rate:
+                bucket.tokens = 0.0
+            bucket.rate = rate
+
+    def consume(self, job_id, nbytes):
+        """Descuenta nbytes del trabajo y duerme lo necesario para respetar su tasa"""
+        if nbytes <= 0:
+            return
+        with self._lock:
+            bucket = self._jobs.get(job_id)
+            if not bucket or not bucket.rate:
+                return
+            bucket.refill(time.monotonic())
+            bucket.tokens -= nbytes
+            wait = -bucket.tokens / bucket.rate if bucket.tokens < 0 else 0
+
+        # La deuda de tokens se conserva, así que las esperas largas se reparten
+        if wait > 0:
+            time.sleep(min(wait, MAX_WAIT))
+
+    def current_rates(self):
+        with self._lock:
+            return {job_id: bucket.rate for job_id, bucket in self._jobs.items()}
+
+
+class ProgressCounter:
+    """Convierte el downloaded_bytes acumulado que informa yt-dlp (por archivo) en bytes nuevos.
+
+    yt-dlp cuenta desde lo que ya había en el .part al reanudar, así que cada archivo
+    parte del tamaño de su .part: lo recuperado del disco no se cobra ni cuenta como
+    descargado. Un valor repetido o que retrocede (reintento, fragmentos en paralelo)
+    no suma nada y se sigue contando desde ahí.
+    """
+
+    def __init__(self, folder=None, stem=None):
+        self._lock = threading.Lock()
+        self._seen = self.resume_offsets(folder, stem) if folder and stem else {}
+
+    @staticmethod
+    def resume_offsets(folder, stem):
+        """{archivo final: bytes ya en disco} de los '<stem>.*.part' de la carpeta"""
+        offsets = {}
+        for part in glob.glob(glob.escape(os.path.join(folder, stem)) + '.*.part'):
+            try:
+                offsets[part[:-len('.part')]] = os.path.getsize(part)
+            except OSError:
+                pass
+        return offsets
+
+    def delta(self, filename, downloaded):
+        with self._lock:
+            delta = max(0, downloaded - self._seen.get(filename, 0))
+            self._seen[filename] = downloaded
+            return delta
@@ -0,0 +1,144 @@
+"""Modo por línea de comandos: usa DownloaderModel sin cargar la interfaz gráfica.
+
+Uso:
+    python -m app.cli URL [URL ...] [-i lista.txt] [-m Video|Audio] [-f 720p] [-j 4] [-o carpeta]
+
+Cada evento se imprime en stdout como una línea JSON.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .model import DownloaderModel
+
+
+def _emit(lock, event, **fields):
+    with lock:
+        print(json.dumps({'event': event, **fields}, ensure_ascii=False), flush=True)
+
+
+def _safe_name(title):
+    # Misma limpieza que aplica la interfaz al nombre del archivo
+    name = "".join([c for c in title if c.isalnum() or c in (' ', '-', '_', '.')]).strip()
+    return name or "video_download"
+
+
+def build_format_data(mode, fmt):
+    """Traduce el argumento --format al format_data que espera el modelo"""
+    if mode == "Audio":
+        if fmt in ('best', 'auto'):
+            return {'label': '🎵 MP3 (Mejor)', 'format_id': 'bestaudio/best'}
+        return {'label': fmt, 'format_id': fmt}
+
+    if fmt in ('best', 'auto'):
+        return {'label': '🏆 Automático (Mejor)', 'format_id': 'bv*+ba/b'}
+    match = re.fullmatch(r'(\d+)p', fmt)
+    if match:
+        height = match.group(1)
+        return {'label': f"📺 {fmt}", 'format_id': f"bv*[height<={height}]+ba/b[height<={height}]"}
+    return {'label': fmt, 'format_id': fmt}
+
+
+def read_urls(args):
+    urls = list(args.urls)
+    if args.input:
+        stream = sys.stdin if args.input == '-' else open(args.input, 'r', encoding='utf-8')
+        with stream:
+            for line in stream:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    urls.append(line)
+    return urls
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli",
+                                     description="Descarga videos de YouTube sin interfaz gráfica.")
+    parser.add_argument('urls', nargs='*', help="Enlaces a descargar")
+    parser.add_argument('-i', '--input', help="Archivo con un enlace por línea ('-' para stdin)")
+    parser.add_argument('-m', '--mode', choices=['Video', 'Audio'], default='Video')
+    parser.add_argument('-f', '--format', default='best',
+                        help="best, una altura como 720p o un format_id de yt-dlp")
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="Descargas simultáneas")
+    parser.add_argument('-o', '--output', help="Carpeta de destino (por defecto la de config.json)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    urls = read_urls(args)
+    if not urls:
+        print("No se indicaron enlaces", file=sys.stderr)
+        return 2
+
+    model = DownloaderModel(persist_queue=False)
+    if args.output:
+        os.makedirs(args.output, exist_ok=True)
+        model.download_path = args.output
+    if args.jobs:
+        model.max_concurrent_downloads = max(1, args.jobs)
+
+    lock = threading.Lock()
+    format_data = build_format_data(args.mode, args.format)
+
+    def _prepare(url):
+        try:
+            info, _ = model.extract_info(url)
+            return url, info, None
+        except Exception as e:
+            return url, None, str(e)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=model.max_concurrent_downloads) as pool:
+        prepared = list(pool.map(_prepare, urls))
+
+    for url, info, error in prepared:
+        if error:
+            failed += 1
+            _emit(lock, 'error', url=url, stage='extract', message=error)
+            continue
+        title = info.get('title', 'Video')
+        index = model.add_to_queue(info.get('webpage_url') or url, format_data, args.mode,
+                                   _safe_name(title), title, info.get('thumbnail'), info.get('id'))
+        _emit(lock, 'queued', index=index, url=url, title=title)
+
+    if not model.download_queue:
+        _emit(lock, 'done', completed=0, failed=failed)
+        return 1
+
+    done = threading.Event()
+    last_percent = {}
+    results = {'completed': 0, 'failed': failed}
+
+    def on_progress(i, p):
+        percent = int(p * 100)
+        if last_percent.get(i) != percent:
+            last_percent[i] = percent
+            _emit(lock, 'progress', index=i, progress=round(p, 4))
+
+    def on_complete(i):
+        results['completed'] += 1
+        _emit(lock, 'completed', index=i, title=model.download_queue[i]['title'])
+
+    def on_error(i, msg):
+        results['failed'] += 1
+        _emit(lock, 'error', index=i, stage='download', message=msg)
+
+    model.process_queue(on_progress, on_complete, done.set, on_error)
+    try:
+        while not done.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        _emit(lock, 'interrupted')
+        return 130
+
+    _emit(lock, 'done', **results)
+    return 0 if results['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,47 @@
 import threading
-import os
 from tkinter import messagebox, filedialog
-from plyer import notification
 from .model import DownloaderModel
-from .view import DownloaderView
+from .view import DownloaderView, MINI_VIDEO_TAG
+from .progress import ProgressChannel
+from .player_frame import ensure_vlc
+from . import startup
+from .search_index import LibrarySearchIndex, normalize
+
+SINGLE_DOWNLOAD = "single" # Clave del canal de progreso para la descarga directa
+
+
+def notify(title, message):
+    # plyer se carga al primer aviso (o en el warm-up), no al arrancar
+    from plyer import notification
+    notification.notify(title=title, message=message, app_name="YT Downloader", timeout=5)
+
 
 class DownloaderController:
     def __init__(self):
         self.model = DownloaderModel()
         self.view = DownloaderView(self)
+        self.progress_channel = ProgressChannel(self.view, self._apply_progress_updates)
+        self.view.set_rate_limits(self.model.rate_limit_total_kbps, self.model.rate_limit_job_kbps)
+        self.view.set_max_concurrent(self.model.max_concurrent_downloads)
         self.last_view = "home"
         self.all_files = []
+        self.search_index = LibrarySearchIndex()
+        self._filter_job = None
         
         # Iniciar en la vista Home
         self.show_view("home")
+        self._restore_queue_widgets()
+        startup.mark('ui_built')
 
     def run(self):
+        # Tras pintar la primera ventana, cargar en segundo plano lo que se usa más tarde
+        self.view.after_idle(self._on_first_frame)
         self.view.mainloop()
 
+    def _on_first_frame(self):
+        startup.mark('first_frame')
+        startup.warm_up(['yt_dlp', 'requests', 'plyer', ensure_vlc], on_done=startup.report)
+
     def check_clipboard(self, event=None):
         try:
             if self.last_view != "home": return
@@ -61,10 +85,11 @@ class DownloaderController:
     def _process_formats_ui(self, mode):
         formats, title, thumb_url, _ = self.model.process_formats(mode)
         labels = [f['label'] for f in formats]
+        video_id = self.model.current_video_info.get('id')
         
         # Load thumbnail in background
         def load_thumb():
-            img = self.model.load_thumbnail_image(thumb_url) if thumb_url else None
+            img = self.model.load_thumbnail_image(thumb_url, video_id) if thumb_url else None
             self.view.after(0, lambda: self.view.update_formats_ui(labels, title, img))
             self.view.after(0, lambda: [
                 self.view.fetch_button.configure(state="normal"),
@@ -86,13 +111,6 @@ class DownloaderController:
         custom_name = "".join([c for c in custom_name if c.isalnum() or c in (' ', '-', '_', '.')]).strip()
         
         mode = self.view.type_selector.get()
-        ext = "mp3" if mode == "Audio" else "mp4"
-        
-        final_name = custom_name
-        counter = 1
-        while os.path.exists(os.path.join(self.model.download_path, f"{final_name}.{ext}")):
-            final_name = f"{custom_name} (#{counter})"
-            counter += 1
         
         self.view.download_button.configure(state="disabled", text="Descargando...")
         self.view.progress_container.pack(pady=20, padx=20, fill="x")
@@ -104,17 +122,24 @@ class DownloaderController:
         # Capture title for notification
         video_title = self.model.current_video_info.get('title', 'Video')
 
-        self.model.download_video(url, sel_data, mode, final_name, 
+        # El modelo reserva el nombre libre (custom_name o "custom_name (#N)")
+        self.model.download_video(url, sel_data, mode, custom_name, 
                                   self._on_download_progress, 
                                   lambda: self._on_download_complete(video_title), 
                                   self._on_download_error)
 
     def _on_download_progress(self, p):
-        self.view.after(0, self.view.progress_bar.set, p)
-        self.view.after(0, lambda: self.view.progress_percent_lbl.configure(text=f"{int(p*100)}%"))
-        self.view.after(0, lambda: self.view.progress_status_lbl.configure(text="Descargando..."))
+        self.progress_channel.post(SINGLE_DOWNLOAD, p)
+
+    def _apply_progress_updates(self, updates):
+        for key, p in updates.items():
+            if key == SINGLE_DOWNLOAD:
+                self.view.set_download_progress(p)
+            else:
+                self.view.update_queue_item_status(key, "downloading", p)
 
     def _on_download_complete(self, video_title="Video"):
+        self.progress_channel.discard(SINGLE_DOWNLOAD)
         self.view.after(0, lambda: [
             self.view.progress_bar.set(1),
             self.view.progress_percent_lbl.configure(text="100%"),
@@ -125,15 +150,11 @@ class DownloaderController:
         ])
         
         try:
-            notification.notify(
-                title="Descarga Completada",
-                message=f"{video_title} se ha descargado correctamente.",
-                app_name="YT Downloader",
-                timeout=5
-            )
+            notify("Descarga Completada", f"{video_title} se ha descargado correctamente.")
         except: pass
 
     def _on_download_error(self, msg):
+        self.progress_channel.discard(SINGLE_DOWNLOAD)
         self.view.after(0, lambda: [
             self.view.progress_container.pack_forget(),
             self.view.download_button.configure(state="normal", text="Descargar Ahora"),
@@ -159,14 +180,39 @@ class DownloaderController:
         # Get title and thumbnail from model
         title = self.model.current_video_info.get('title', 'Video')
         thumbnail_url = self.model.current_video_info.get('thumbnail')
+        video_id = self.model.current_video_info.get('id')
 
-        idx = self.model.add_to_queue(url, sel_data, mode, custom_name, title, thumbnail_url)
+        idx = self.model.add_to_queue(url, sel_data, mode, custom_name, title, thumbnail_url, video_id)
         
         # Add to UI
         item_data = self.model.download_queue[idx]
         self.view.add_queue_item_widget(item_data, idx)
+        self._load_queue_thumbnail(idx, item_data)
         
-        self.view.show_toast("Video agregado a la cola")
+        if self.model.is_queue_running():
+            self.view.show_toast("Video agregado a la cola en curso")
+        else:
+            self.view.show_toast("Video agregado a la cola")
+
+    def _restore_queue_widgets(self):
+        # Items que quedaron pendientes en la sesión anterior (journal de la cola)
+        if not self.model.download_queue: return
+        for idx, item_data in enumerate(self.model.download_queue):
+            self.view.add_queue_item_widget(item_data, idx)
+            if item_data['status'] == 'error':
+                self.view.update_queue_item_status(idx, "error")
+            self._load_queue_thumbnail(idx, item_data)
+        self.view.after(500, lambda: self.view.show_toast(
+            f"Se restauraron {len(self.model.download_queue)} descargas pendientes"))
+
+    def _load_queue_thumbnail(self, index, item_data):
+        if not item_data.get('thumbnail_url'): return
+
+        def _thread():
+            img = self.model.load_thumbnail_image(item_data['thumbnail_url'], item_data.get('video_id'), variant='list')
+            if img:
+                self.view.after(0, lambda: self.view.set_queue_item_thumbnail(index, img))
+        threading.Thread(target=_thread, daemon=True).start()
 
     def start_queue(self):
         if not self.model.download_queue:
@@ -174,19 +220,28 @@ class DownloaderController:
             return
             
         self.show_view("queue")
-        self.view.btn_start_queue.configure(state="disabled", text="Procesando...")
         
-        self.model.process_queue(
+        started = self.model.process_queue(
             self._on_queue_progress,
             self._on_queue_item_complete,
             self._on_queue_all_complete,
             self._on_queue_error
         )
+        if started:
+            self.view.btn_start_queue.configure(state="disabled", text="Procesando...")
+
+    def on_rate_limit_change(self):
+        total_kbps, job_kbps = self.view.get_rate_limits()
+        self.model.set_rate_limits(total_kbps, job_kbps)
+
+    def on_concurrency_change(self, value):
+        self.model.set_max_concurrent_downloads(value)
 
     def _on_queue_progress(self, index, p):
-        self.view.after(0, lambda: self.view.update_queue_item_status(index, "downloading", p))
+        self.progress_channel.post(index, p)
 
     def _on_queue_item_complete(self, index):
+        self.progress_channel.discard(index)
         self.view.after(0, lambda: self.view.update_queue_item_status(index, "completed"))
 
     def _on_queue_all_complete(self):
@@ -196,15 +251,11 @@ class DownloaderController:
         ])
         
         try:
-            notification.notify(
-                title="Cola Finalizada",
-                message="Todas las descargas de la cola han terminado.",
-                app_name="YT Downloader",
-                timeout=5
-            )
+            notify("Cola Finalizada", "Todas las descargas de la cola han terminado.")
         except: pass
 
     def _on_queue_error(self, index, msg):
+        self.progress_channel.discard(index)
         self.view.after(0, lambda: [
             self.view.update_queue_item_status(index, "error"),
             print(f"Error en item {index}: {msg}")
@@ -237,41 +288,45 @@ class DownloaderController:
         # Mini Player Logic
         if is_leaving_player:
             # Solo activar si el reproductor está activo (Playing/Paused) y NO detenido explícitamente
-            # Usamos is_playing del frame que rastrea el estado lógico, o consultamos a VLC
-            player = self.view.player_frame.player
-            should_minimize = False
-            
-            if player:
-                state = player.get_state()
-                # Estados válidos para minimizar: Playing, Paused, Buffering
-                # Estados inválidos: Stopped, Ended, Error (que ocurren al cerrar con X)
-                import vlc
-                if state in [vlc.State.Playing, vlc.State.Paused, vlc.State.Buffering, vlc.State.Opening]:
-                    should_minimize = True
-            
-            if should_minimize:
+            # Estados inválidos: Stopped, Ended, Error (que ocurren al cerrar con X)
+            if self.view.player_frame.is_active():
                 # Show mini player
                 self.view.show_mini_player()
                 self.view.update_idletasks() # Ensure UI is updated
                 # Switch output to mini player
-                self.view.player_frame.switch_output(self.view.mini_video_container.winfo_id())
+                self.view.player_frame.switch_output(self.view.mini_video_container, bind_tag=MINI_VIDEO_TAG)
         
         elif is_entering_player:
             # Hide mini player
             self.view.hide_mini_player()
             self.view.update_idletasks()
             # Switch output back to main player
-            self.view.player_frame.switch_output(self.view.player_frame.video_frame.winfo_id())
+            self.view.player_frame.switch_output(self.view.player_frame.video_container)
         
         # Asegurar que las etiquetas de ruta estén actualizadas en todas las vistas
         self.view.update_path_labels(self.model.download_path)
         
-        if view_name == "library":
-            self.all_files = self.model.get_library_files()
-            self.view.render_library(self.all_files)
+        if view_name == "stats":
+            self.view.render_stats(self.model.telemetry.summary(), self.model.telemetry.recent_jobs())
+        elif view_name == "library":
+            # Mostrar el índice al instante y sincronizarlo con el disco en segundo plano
+            self._set_library_files(self.model.get_library_files(cached_only=True))
+            self._apply_library_filter()
+            threading.Thread(target=self._refresh_library_thread, daemon=True).start()
         elif view_name == "home":
             pass # Ya se actualizó arriba con update_path_labels
 
+    def _refresh_library_thread(self):
+        folder, files, changed = self.model.refresh_library_files()
+        if not changed: return
+
+        def _apply():
+            if folder != self.model.download_path: return
+            self._set_library_files(files)
+            if self.last_view == "library":
+                self._apply_library_filter()
+        self.view.after(0, _apply)
+
     def toggle_play(self):
         if hasattr(self.view, 'player_frame'):
             self.view.player_frame.toggle_play()
@@ -284,16 +339,69 @@ class DownloaderController:
             self.view.player_frame.stop()
         self.view.hide_mini_player()
 
+    def _set_library_files(self, files):
+        self.all_files = files
+        self.search_index = None
+
+        # El índice de búsqueda se construye fuera del hilo de la UI
+        def _build():
+            index = LibrarySearchIndex(files)
+            def _swap():
+                if self.all_files is files:
+                    self.search_index = index
+            self.view.after(0, _swap)
+        threading.Thread(target=_build, daemon=True).start()
+
     def filter_library(self, *args):
-        q = self.view.search_var.get().lower()
-        filtered = [f for f in self.all_files if q in f['name'].lower()]
+        # Debounce: filtrar cuando el usuario deja de escribir
+        if self._filter_job:
+            self.view.after_cancel(self._filter_job)
+        self._filter_job = self.view.after(120, self._apply_library_filter)
+
+    def _apply_library_filter(self):
+        self._filter_job = None
+        q = self.view.search_var.get()
+        if self.search_index is not None:
+            filtered = self.search_index.search(q)
+        else:
+            # Índice aún en construcción: recorrido lineal
+            tokens = normalize(q).split()
+            filtered = [f for f in self.all_files if all(t in normalize(f['name']) for t in tokens)]
         self.view.render_library(filtered)
 
     def play_preview(self):
-        if self.model.preview_url:
-            self.open_player(self.model.preview_url, "Previsualización", self.model.preview_formats)
-        else:
+        # Las URLs de stream de la caché pueden haber caducado: renovarlas antes de abrir el reproductor
+        if self.model.streams_expired:
+            self.view.preview_btn.configure(state="disabled")
+            self.model.refresh_streams(self._on_streams_refreshed, self._on_streams_refresh_error)
+            return
+
+        if not self.model.preview_formats:
             messagebox.showinfo("Aviso", "No se pudo obtener una URL de previsualización para este video.")
+            return
+
+        # La calidad inicial depende del ancho de banda medido (puede sondear la red)
+        self.view.preview_btn.configure(state="disabled")
+        def _thread():
+            url = self.model.select_preview_url()
+            self.view.after(0, lambda: [
+                self.view.preview_btn.configure(state="normal"),
+                self.open_player(url, "Previsualización", self.model.preview_formats)
+            ])
+        threading.Thread(target=_thread, daemon=True).start()
+
+    def _on_streams_refreshed(self, info):
+        def _ui():
+            self.view.preview_btn.configure(state="normal")
+            self.model.process_formats(self.view.type_selector.get())
+            self.play_preview()
+        self.view.after(0, _ui)
+
+    def _on_streams_refresh_error(self, error_msg):
+        self.view.after(0, lambda: [
+            self.view.preview_btn.configure(state="normal"),
+            messagebox.showerror("Error", error_msg)
+        ])
 
     def open_player(self, uri, title, formats=None):
         # Asegurar que el mini player esté oculto y el output reseteado antes de cargar nuevo video
@@ -0,0 +1,107 @@
+import cProfile
+import functools
+import io
+import itertools
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+from .paths import get_data_dir
+
+# Perfilado opcional: YTD_PROFILE=1 o "profiling": true en config.json.
+# Cada llamada envuelta deja en la carpeta de diagnósticos un .prof (abrir con
+# pstats o snakeviz) y un .txt con las funciones más costosas y las asignaciones
+# de memoria que más crecieron durante la llamada.
+
+TRACE_FRAMES = 10 # Profundidad de pila que guarda tracemalloc
+TOP_ALLOCATIONS = 25
+TOP_FUNCTIONS = 30
+
+_enabled = os.getenv('YTD_PROFILE') == '1'
+_lock = threading.Lock()
+_seq = itertools.count(1)
+
+
+def configure(enabled):
+    """Activa el perfilado desde config.json; YTD_PROFILE=1 lo fuerza siempre"""
+    global _enabled
+    _enabled = bool(enabled) or os.getenv('YTD_PROFILE') == '1'
+
+
+def is_enabled():
+    return _enabled
+
+
+def profiled(name):
+    """Decorador: perfila cada llamada cuando el perfilado está activo (sin coste si no)"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            return _run_profiled(name, func, args, kwargs)
+        return wrapper
+    return decorator
+
+
+def _run_profiled(name, func, args, kwargs):
+    with _lock:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+    before = tracemalloc.take_snapshot()
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Otro perfilador ya activo (en Python 3.12+ solo puede haber uno por proceso)
+        profiler = None
+
+    started = time.perf_counter()
+    error = None
+    try:
+        return func(*args, **kwargs)
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        if profiler:
+            profiler.disable()
+        try:
+            _write_report(name, profiler, before, tracemalloc.take_snapshot(), elapsed, error)
+        except Exception as e:
+            print(f"Error guardando diagnóstico de {name}: {e}")
+
+
+def _write_report(name, profiler, before, after, elapsed, error):
+    folder = get_data_dir("diagnostics")
+    stem = os.path.join(folder, f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{next(_seq)}")
+
+    out = io.StringIO()
+    out.write(f"{name}: {elapsed * 1000:.1f} ms en el hilo {threading.current_thread().name}\n")
+    if error is not None:
+        out.write(f"Terminó con error: {error!r}\n")
+
+    if profiler:
+        profiler.dump_stats(stem + ".prof")
+        out.write(f"\n== Funciones por tiempo acumulado (top {TOP_FUNCTIONS}) ==\n")
+        pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+    else:
+        out.write("\nSin cProfile: había otro perfilador activo.\n")
+
+    # Solo lo que creció durante la llamada (otros hilos también cuentan)
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+    diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'traceback')
+    out.write(f"\n== Asignaciones que más crecieron (top {TOP_ALLOCATIONS}) ==\n")
+    for stat in diff[:TOP_ALLOCATIONS]:
+        out.write(f"{stat.size_diff / 1024:+.1f} KB en {stat.count_diff:+d} bloques\n")
+        for line in stat.traceback.format(limit=4):
+            out.write(f"    {line}\n")
+
+    current, peak = tracemalloc.get_traced_memory()
+    out.write(f"\nMemoria rastreada: {current / 1024 ** 2:.1f} MB (pico {peak / 1024 ** 2:.1f} MB)\n")
+    with open(stem + ".txt", 'w', encoding='utf-8') as f:
+        f.write(out.getvalue())
@@ -0,0 +1,153 @@
+# Preferencia de códec a igual resolución y fps: avc1 es el más compatible con MP4
+CODEC_RANK = {'avc1': 3, 'vp9': 2, 'av1': 1}
+
+
+def codec_family(vcodec):
+    vcodec = (vcodec or '').lower()
+    if vcodec.startswith(('avc1', 'h264')): return 'avc1'
+    if vcodec.startswith(('vp9', 'vp09')): return 'vp9'
+    if vcodec.startswith(('av01', 'av1')): return 'av1'
+    return vcodec.split('.')[0] or 'none'
+
+
+def format_size(num_bytes):
+    """Tamaño legible: ~245 MB, ~1.2 GB"""
+    if not num_bytes: return ""
+    if num_bytes >= 1024 ** 3:
+        return f"~{num_bytes / 1024 ** 3:.1f} GB"
+    return f"~{max(1, round(num_bytes / 1024 ** 2))} MB"
+
+
+class FormatTable:
+    """Tabla de formatos de un video, construida una sola vez por info dict.
+
+    Normaliza cada formato (altura, fps, códec, bitrate y tamaño estimado) y guarda
+    en caché las opciones de descarga de cada modo.
+    """
+
+    def __init__(self, info):
+        self.info = info
+        self.duration = info.get('duration') or 0
+        self.rows = [self._row(f) for f in info.get('formats') or [] if f.get('format_id')]
+        audio_only = [r for r in self.rows if r['has_audio'] and not r['has_video']]
+        self.best_audio = max(audio_only, key=lambda r: (r['abr'], r['size']), default=None)
+        self._views = {}
+
+    def _row(self, f):
+        vcodec = f.get('vcodec')
+        acodec = f.get('acodec')
+        tbr = f.get('tbr') or 0
+        size = f.get('filesize') or f.get('filesize_approx')
+        if not size and tbr and self.duration:
+            size = int(tbr * 1000 / 8 * self.duration)
+        return {
+            'format_id': f['format_id'],
+            'height': f.get('height') or 0,
+            'fps': round(f.get('fps') or 0),
+            'codec': codec_family(vcodec),
+            'tbr': tbr,
+            'abr': f.get('abr') or 0,
+            'size': size or 0,
+            'has_video': bool(vcodec and vcodec != 'none' and f.get('height')),
+            'has_audio': bool(acodec and acodec != 'none'),
+            'url': f.get('url'),
+            'protocol': f.get('protocol') or '',
+            'manifest_url': f.get('manifest_url'),
+        }
+
+    @staticmethod
+    def rank_key(row):
+        return (row['height'], row['fps'], CODEC_RANK.get(row['codec'], 0), row['tbr'], row['size'])
+
+    def _choice_size(self, row):
+        if row['has_audio'] or not self.best_audio:
+            return row['size']
+        return row['size'] + self.best_audio['size']
+
+    def _choice(self, row, lbl):
+        f_id = row['format_id'] if row['has_audio'] else f"{row['format_id']}+bestaudio"
+        size = self._choice_size(row)
+        return {
+            'label': f"📺 {lbl}" + (f" · {format_size(size)}" if size else ""),
+            'format_id': f_id,
+            'height': row['height'],
+            'fps': row['fps'],
+            'vcodec': row['codec'],
+            'filesize': size,
+        }
+
+    def video_choices(self):
+        if 'Video' in self._views:
+            return self._views['Video']
+
+        # Una opción por resolución + fps; dentro del grupo gana el mejor rango.
+        # Si otra variante del grupo es claramente más ligera, se ofrece también.
+        groups = {}
+        for row in self.rows:
+            if not row['has_video']: continue
+            groups.setdefault((row['height'], 60 if row['fps'] > 30 else 0), []).append(row)
+
+        choices = []
+        for (height, high_fps), rows in sorted(groups.items(), reverse=True):
+            best = max(rows, key=self.rank_key)
+            lbl = f"{height}p{best['fps'] if high_fps else ''}"
+            choices.append(self._choice(best, lbl))
+
+            sized = [r for r in rows if r['size']]
+            lightest = min(sized, key=self._choice_size, default=None)
+            if lightest and lightest is not best and best['size'] \
+                    and self._choice_size(lightest) < self._choice_size(best) * 0.85:
+                choices.append(self._choice(lightest, f"{lbl} ({lightest['codec'].upper()})"))
+
+        best_size = choices[0]['filesize'] if choices else 0
+        auto = {'label': '🏆 Automático (Mejor)' + (f" · {format_size(best_size)}" if best_size else ""),
+                'format_id': 'bv*+ba/b', 'height': choices[0]['height'] if choices else 0, 'filesize': best_size}
+        self._views['Video'] = [auto] + choices
+        return self._views['Video']
+
+    def audio_choices(self):
+        if 'Audio' not in self._views:
+            size = self.best_audio['size'] if self.best_audio else 0
+            self._views['Audio'] = [{'label': '🎵 MP3 (Mejor)' + (f" · {format_size(size)}" if size else ""),
+                                     'format_id': 'bestaudio/best', 'filesize': size}]
+        return self._views['Audio']
+
+    def choices(self, mode):
+        return self.audio_choices() if mode == "Audio" else self.video_choices()
+
+    def preview_rows(self):
+        """{'720p': fila} con el mejor formato progresivo (video+audio) de cada altura"""
+        if 'preview' not in self._views:
+            best = {}
+            for row in self.rows:
+                if row['has_video'] and row['has_audio'] and row['url'] and not row['protocol'].startswith('m3u8'):
+                    label = f"{row['height']}p"
+                    if label not in best or self.rank_key(row) > self.rank_key(best[label]):
+                        best[label] = row
+            self._views['preview'] = best
+        return self._views['preview']
+
+    def preview_formats(self):
+        return {label: row['url'] for label, row in self.preview_rows().items()}
+
+    def hls_manifest(self):
+        """URL del manifiesto HLS maestro (adaptativo) si el video lo ofrece"""
+        for row in self.rows:
+            if row['protocol'].startswith('m3u8') and row['manifest_url']:
+                return row['manifest_url']
+        return None
+
+    def pick_preview(self, throughput=None, headroom=1.5):
+        """Etiqueta de la mayor calidad progresiva que cabe en 'throughput' (bytes/s)"""
+        rows = self.preview_rows()
+        if not rows: return None
+        by_height = sorted(rows.items(), key=lambda item: item[1]['height'])
+        if throughput is None:
+            # Sin medición: 720p si existe, si no 360p, si no la más baja
+            for label in ('720p', '360p'):
+                if label in rows: return label
+            return by_height[0][0]
+
+        fitting = [label for label, row in by_height
+                   if row['tbr'] and row['tbr'] * 1000 / 8 * headroom <= throughput]
+        return fitting[-1] if fitting else by_height[0][0]
@@ -0,0 +1,121 @@
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlparse, parse_qs
+
+from .paths import get_data_dir
+
+# Los metadatos (título, miniatura, lista de formatos) cambian muy poco
+INFO_TTL = 7 * 24 * 3600
+# Las URLs firmadas de formats[*].url caducan (~6 h en YouTube)
+STREAM_TTL = 5 * 3600
+# Margen de seguridad respecto al parámetro 'expire' de las URLs
+STREAM_EXPIRE_MARGIN = 15 * 60
+
+# Campos voluminosos que la app no usa y no merece la pena guardar
+_DROPPED_FIELDS = ('automatic_captions', 'subtitles', 'heatmap')
+
+_YT_ID_RE = re.compile(r'(?:v=|youtu\.be/|shorts/|embed/|live/)([A-Za-z0-9_-]{11})')
+
+
+def video_key(url):
+    """Clave de caché estable para una URL (id de YouTube si se puede extraer)"""
+    match = _YT_ID_RE.search(url or '')
+    if match:
+        return f"youtube:{match.group(1)}"
+    return (url or '').strip()
+
+
+def _streams_expire_at(info, fetched_at):
+    expires = []
+    for f in info.get('formats') or []:
+        url = f.get('url')
+        if not url:
+            continue
+        try:
+            value = parse_qs(urlparse(url).query).get('expire')
+            if value:
+                expires.append(int(value[0]))
+        except (ValueError, TypeError):
+            continue
+    if expires:
+        return min(expires) - STREAM_EXPIRE_MARGIN
+    return fetched_at + STREAM_TTL
+
+
+class InfoCache:
+    """Caché en SQLite de los info dicts de yt-dlp, indexada por id de video"""
+
+    def __init__(self, db_path=None, info_ttl=INFO_TTL):
+        self.db_path = db_path or os.path.join(get_data_dir(), "info_cache.sqlite3")
+        self.info_ttl = info_ttl
+        self._lock = threading.Lock()
+        self._init_db()
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Conexión dentro de una transacción que se cierra al salir (el 'with' de sqlite3 no la cierra)"""
+        with contextlib.closing(sqlite3.connect(self.db_path, timeout=5)) as conn:
+            with conn:
+                yield conn
+
+    def _init_db(self):
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS video_info ("
+                    " key TEXT PRIMARY KEY,"
+                    " fetched_at REAL NOT NULL,"
+                    " streams_expire_at REAL NOT NULL,"
+                    " data BLOB NOT NULL)"
+                )
+        except sqlite3.Error as e:
+            print(f"Error inicializando caché de metadatos: {e}")
+
+    def get(self, url):
+        """Devuelve (info, streams_fresh) o (None, False) si no hay entrada válida"""
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT fetched_at, streams_expire_at, data FROM video_info WHERE key = ?",
+                    (video_key(url),)
+                ).fetchone()
+        except sqlite3.Error:
+            return None, False
+
+        if not row:
+            return None, False
+        fetched_at, streams_expire_at, data = row
+        if now - fetched_at > self.info_ttl:
+            return None, False
+        try:
+            info = json.loads(zlib.decompress(data).decode('utf-8'))
+        except (zlib.error, ValueError):
+            return None, False
+        return info, now < streams_expire_at
+
+    def put(self, url, info):
+        now = time.time()
+        slim = {k: v for k, v in info.items() if k not in _DROPPED_FIELDS}
+        try:
+            data = zlib.compress(json.dumps(slim, default=str).encode('utf-8'))
+        except (TypeError, ValueError):
+            return
+        keys = {video_key(url)}
+        if info.get('webpage_url'):
+            keys.add(video_key(info['webpage_url']))
+        try:
+            with self._lock, self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO video_info (key, fetched_at, streams_expire_at, data) VALUES (?, ?, ?, ?)",
+                    [(k, now, _streams_expire_at(info, now), data) for k in keys if k]
+                )
+                conn.execute("DELETE FROM video_info WHERE fetched_at < ?", (now - self.info_ttl,))
+        except sqlite3.Error as e:
+            print(f"Error guardando caché de metadatos: {e}")
@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+
+from .paths import get_data_dir
+
+LIBRARY_EXTS = {'Video': ['.mp4', '.mkv', '.webm', '.avi'], 'Audio': ['.mp3', '.m4a', '.wav', '.flac']}
+_EXT_TYPES = {ext: ftype for ftype, exts in LIBRARY_EXTS.items() for ext in exts}
+
+
+def media_type(name):
+    return _EXT_TYPES.get(os.path.splitext(name)[1].lower())
+
+
+class LibraryIndex:
+    """Índice persistente de la biblioteca: {carpeta: {mtime de carpeta, {nombre: [tamaño, mtime]}}}.
+
+    Una carpeta solo se vuelve a recorrer (con os.scandir) cuando su mtime cambia,
+    y las descargas terminadas se registran directamente con add_file().
+    También reparte nombres de salida únicos entre descargas concurrentes (reserve_name).
+    """
+
+    def __init__(self, index_path=None):
+        self.index_path = index_path or os.path.join(get_data_dir(), "library_index.json")
+        self._lock = threading.RLock()
+        self._folders = {}
+        self._taken = {}       # carpeta -> (entries del índice, nombres normalizados)
+        self._reserved = {}    # carpeta -> nombres reservados por descargas en curso
+        self._next_suffix = {} # (carpeta, stem, ext) -> siguiente sufijo a probar
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._folders = data
+        except (OSError, ValueError):
+            self._folders = {}
+
+    def _save(self):
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._folders, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"Error guardando índice de biblioteca: {e}")
+
+    @staticmethod
+    def _key(folder):
+        return os.path.normcase(os.path.abspath(folder))
+
+    @staticmethod
+    def _dir_mtime(folder):
+        try:
+            return os.stat(folder).st_mtime_ns
+        except OSError:
+            return None
+
+    def _scan(self, folder):
+        entries = {}
+        with os.scandir(folder) as it:
+            for entry in it:
+                if not media_type(entry.name):
+                    continue
+                try:
+                    if not entry.is_file():
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                entries[entry.name] = [st.st_size, st.st_mtime]
+        return entries
+
+    def _files(self, folder, record):
+        files = []
+        for name, (size, mtime) in record['entries'].items():
+            files.append({
+                'name': name,
+                'path': os.path.join(folder, name),
+                'type': media_type(name),
+                'size': size,
+                'mtime': mtime
+            })
+        files.sort(key=lambda f: f['name'].lower())
+        return files
+
+    def is_stale(self, folder):
+        with self._lock:
+            record = self._folders.get(self._key(folder))
+            return not record or record.get('dir_mtime') != self._dir_mtime(folder)
+
+    def get_files(self, folder, refresh=True):
+        """Lista los archivos de la carpeta; con refresh=False devuelve el índice tal cual"""
+        if refresh:
+            return self.refresh(folder)[0]
+        with self._lock:
+            record = self._folders.get(self._key(folder))
+            return self._files(folder, record) if record else []
+
+    def refresh(self, folder):
+        """Re-escanea la carpeta solo si su mtime cambió. Devuelve (archivos, cambió)"""
+        key = self._key(folder)
+        dir_mtime = self._dir_mtime(folder)
+        with self._lock:
+            record = self._folders.get(key)
+            if dir_mtime is None:
+                changed = key in self._folders
+                self._folders.pop(key, None)
+                return [], changed
+
+            if record and record.get('dir_mtime') == dir_mtime:
+                return self._files(folder, record), False
+            known = set(record['entries']) if record else set()
+
+        # El recorrido va fuera del lock: reserve_name/add_file no esperan a carpetas grandes
+        try:
+            entries = self._scan(folder)
+        except OSError:
+            with self._lock:
+                record = self._folders.get(key)
+                return (self._files(folder, record) if record else []), False
+
+        with self._lock:
+            record = self._folders.get(key)
+            if record:
+                # Archivos que add_file registró mientras se recorría la carpeta
+                for name in set(record['entries']) - known - set(entries):
+                    if os.path.exists(os.path.join(folder, name)):
+                        entries[name] = record['entries'][name]
+            changed = not record or record.get('entries') != entries
+            record = {'dir_mtime': dir_mtime, 'entries': entries}
+            self._folders[key] = record
+            self._save()
+            return self._files(folder, record), changed
+
+    def add_file(self, path):
+        """Registra un archivo recién descargado sin recorrer la carpeta"""
+        name = os.path.basename(path)
+        if not media_type(name):
+            return
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        with self._lock:
+            key = self._key(os.path.dirname(path))
+            record = self._folders.setdefault(key, {'dir_mtime': None, 'entries': {}})
+            # dir_mtime no se toca: el archivo aparece ya en la vista, y el siguiente refresh en
+            # segundo plano recoge cualquier otro cambio hecho en la carpeta mientras tanto
+            record['entries'][name] = [st.st_size, st.st_mtime]
+            cached = self._taken.get(key)
+            if cached and cached[0] is record['entries']:
+                cached[1].add(os.path.normcase(name))
+            self._save()
+
+    # --- Reserva de nombres ---
+    def _taken_names(self, key):
+        record = self._folders.get(key)
+        entries = record['entries'] if record else {}
+        cached = self._taken.get(key)
+        if not cached or cached[0] is not entries:
+            cached = (entries, {os.path.normcase(n) for n in entries})
+            self._taken[key] = cached
+        return cached[1]
+
+    def reserve_name(self, folder, stem, ext):
+        """Reserva '<stem>.<ext>' o el primer '<stem> (#N).<ext>' libre y devuelve el stem elegido"""
+        with self._lock:
+            key = self._key(folder)
+            taken = self._taken_names(key)
+            reserved = self._reserved.setdefault(key, set())
+            hint = (key, os.path.normcase(stem), ext)
+            counter = self._next_suffix.get(hint, 0)
+            while True:
+                candidate = stem if counter == 0 else f"{stem} (#{counter})"
+                name = os.path.normcase(f"{candidate}.{ext}")
+                counter += 1
+                if name in taken or name in reserved:
+                    continue
+                # El índice puede no conocer archivos recientes: un stat basta para confirmarlo
+                if os.path.exists(os.path.join(folder, f"{candidate}.{ext}")):
+                    continue
+                reserved.add(name)
+                self._next_suffix[hint] = counter
+                return candidate
+
+    def claim_name(self, folder, stem, ext):
+        """Marca como reservado un nombre ya elegido (p. ej. items restaurados de la cola)"""
+        with self._lock:
+            self._reserved.setdefault(self._key(folder), set()).add(os.path.normcase(f"{stem}.{ext}"))
+
+    def release_name(self, folder, stem, ext):
+        with self._lock:
+            key = self._key(folder)
+            reserved = self._reserved.get(key)
+            if reserved:
+                reserved.discard(os.path.normcase(f"{stem}.{ext}"))
+            # El nombre liberado vuelve a estar disponible: las pistas de sufijo de la carpeta
+            # podrían haberlo dejado atrás (p. ej. "foo" tras reservar "foo (#1)")
+            for hint in [h for h in self._next_suffix if h[0] == key and h[2] == ext]:
+                del self._next_suffix[hint]
@@ -2,42 +2,97 @@ import os
 import json
 import threading
 import time
-import requests
 import subprocess
 import sys
+from collections import deque
 from io import BytesIO
 from PIL import Image
-from functools import lru_cache
+from .info_cache import InfoCache
+from .library_index import LibraryIndex
+from .thumbnail_store import ThumbnailStore
+from .queue_journal import QueueJournal
+from .bandwidth import BandwidthScheduler, ProgressCounter
+from .formats import FormatTable
+from .telemetry import Telemetry, RetryLogger
+from .postprocess import PostProcessPool, default_workers
+from . import diagnostics
+
+MB = 1024 * 1024
+
+# Fragmentos DASH/HLS simultáneos y tamaño de los bloques HTTP Range por modo.
+# Se pueden sobrescribir en config.json con fragment_concurrency_video/audio y http_chunk_size_mb.
+FRAGMENT_DEFAULTS = {
+    'Video': {'concurrent_fragment_downloads': 4, 'http_chunk_size_mb': 10},
+    'Audio': {'concurrent_fragment_downloads': 2, 'http_chunk_size_mb': 10},
+}
 
 class DownloaderModel:
-    def __init__(self):
+    def __init__(self, persist_queue=True):
         self.config_file = "config.json"
+        self.config_data = {}
         self.download_path = self.load_config()
+        diagnostics.configure(self.config_data.get('profiling', False))
         self.current_video_info = None
+        self.streams_expired = False # True si las URLs de formats[*].url vienen caducadas de la caché
+        self.info_cache = InfoCache()
+        self.library_index = LibraryIndex()
+        self.thumbnail_store = ThumbnailStore()
         self.available_formats = []
+        self.format_table = None
         self.preview_url = None
         self.preview_formats = {}
-        self.download_queue = []
+        self.throughput_samples = deque(maxlen=50) # (instante, bytes/s) de descargas y sondeos recientes
+        self.telemetry = Telemetry()
+        # La cola se guarda en disco y se restaura al abrir la app (desactivado en modo CLI)
+        self.queue_journal = QueueJournal() if persist_queue else None
+        self.download_queue = self.queue_journal.load() if self.queue_journal else []
+        for item in self.download_queue:
+            # Los .part de estos items siguen siendo suyos: que nadie más tome ese nombre
+            if item.get('output_stem'):
+                # Colas guardadas antes de output_folder: la carpeta de entonces es la de config.json
+                item['output_folder'] = item.get('output_folder') or self.download_path
+                ext = "mp3" if item['mode'] == "Audio" else "mp4"
+                self.library_index.claim_name(item['output_folder'], item['output_stem'], ext)
+
+        # Estado del pool de descargas de la cola
+        self.max_concurrent_downloads = self._get_int_setting('max_concurrent_downloads', 4)
+        # Postproceso (FFmpeg) en su propio pool: la red sigue con el siguiente item mientras tanto
+        self.postprocess_pool = PostProcessPool(self._get_int_setting('max_concurrent_postprocess', default_workers()))
+
+        # Límites de ancho de banda en KB/s (0 = sin límite), ajustables en caliente
+        self.rate_limit_total_kbps = self._get_int_setting('rate_limit_total_kbps', 0, minimum=0)
+        self.rate_limit_job_kbps = self._get_int_setting('rate_limit_job_kbps', 0, minimum=0)
+        self.bandwidth = BandwidthScheduler(self.rate_limit_total_kbps * 1024 or None,
+                                            self.rate_limit_job_kbps * 1024 or None)
+        self._queue_cond = threading.Condition()
+        self._pending_indices = deque()
+        self._active_jobs = 0
+        self._busy_workers = 0 # Hilos de la cola ocupados con una descarga (no cuenta el postproceso)
+        self._workers_alive = 0
+        self._queue_running = False
+        self._queue_callbacks = None
 
-    @lru_cache(maxsize=50)
-    def load_thumbnail_image(self, url):
+    def load_thumbnail_image(self, url, video_id=None, variant='card'):
+        """Miniatura del video desde el almacén en disco; se descarga una sola vez"""
+        key = ThumbnailStore.key_for_video(video_id) if video_id else ThumbnailStore.key_for_video(url)
+        img = self.thumbnail_store.get(key, variant)
+        if img is not None:
+            return img
+        if not url:
+            return None
+
+        import requests # Import diferido: no hace falta para pintar la ventana
         try:
             # Add a timeout so slow or broken requests do not hang indefinitely
             response = requests.get(url, timeout=5)
             # Raise for HTTP errors to avoid caching error pages as images
             response.raise_for_status()
 
-            img_data = BytesIO(response.content)
-            pil_image = Image.open(img_data)
+            pil_image = Image.open(BytesIO(response.content))
             # Fully load the image data before closing the BytesIO
             pil_image.load()
-            # Optionally downscale to a thumbnail to reduce memory usage in the cache
-            try:
-                pil_image.thumbnail((320, 180), Image.LANCZOS)
-            except Exception:
-                # If thumbnailing fails for any reason, fall back to the original image
-                pass
-            return pil_image
+            # Guardar las variantes ya redimensionadas (lista y tarjeta)
+            return self.thumbnail_store.put(key, pil_image)[variant]
         except (requests.RequestException, OSError, Image.UnidentifiedImageError):
             return None
 
@@ -47,7 +102,9 @@ class DownloaderModel:
             if os.path.exists(self.config_file):
                 with open(self.config_file, 'r') as f:
                     data = json.load(f)
-                    path = data.get('download_path', '')
+                    if isinstance(data, dict):
+                        self.config_data = data
+                    path = self.config_data.get('download_path', '')
                     if path and os.path.exists(path):
                         return path
         except Exception as e:
@@ -56,12 +113,23 @@ class DownloaderModel:
 
     def save_config(self, path):
         self.download_path = path
+        self.config_data['download_path'] = path
+        self._write_config()
+
+    def _write_config(self):
+        # Se conserva el resto de claves (ajustes avanzados) al reescribir el archivo
         try:
             with open(self.config_file, 'w') as f:
-                json.dump({'download_path': self.download_path}, f)
+                json.dump(self.config_data, f)
         except Exception as e:
             print(f"Error guardando config: {e}")
 
+    def _get_int_setting(self, key, default, minimum=1):
+        try:
+            return max(minimum, int(self.config_data.get(key, default)))
+        except (TypeError, ValueError):
+            return default
+
     def _get_ffmpeg_path(self):
         """Obtiene la ruta de ffmpeg dependiendo de si es script o EXE"""
         
@@ -86,24 +154,63 @@ class DownloaderModel:
                 
         return None # Dejar que yt-dlp busque en PATH
 
+    def extract_info(self, url, use_cache=True, job=None):
+        """Devuelve (info, streams_fresh), usando la caché en disco si es posible"""
+        if use_cache:
+            info, streams_fresh = self.info_cache.get(url)
+            if info:
+                if job: job.fields['cache_hit'] = True
+                return info, streams_fresh
+
+        import yt_dlp
+        opts = {'quiet': True}
+        if job:
+            job.fields['cache_hit'] = False
+            opts['logger'] = RetryLogger(job)
+        ffmpeg_loc = self._get_ffmpeg_path()
+        if ffmpeg_loc:
+            opts['ffmpeg_location'] = ffmpeg_loc
+
+        with yt_dlp.YoutubeDL(opts) as ydl:
+            info = ydl.extract_info(url, download=False)
+        info = ydl.sanitize_info(info)
+        self.info_cache.put(url, info)
+        return info, True
+
     def fetch_video_info(self, url, callback_success, callback_error):
+        @diagnostics.profiled("fetch_video_info")
         def _thread():
+            job = self.telemetry.start_job('info', url)
             try:
-                import yt_dlp
-                opts = {'quiet': True}
-                ffmpeg_loc = self._get_ffmpeg_path()
-                if ffmpeg_loc:
-                    opts['ffmpeg_location'] = ffmpeg_loc
-                    
-                with yt_dlp.YoutubeDL(opts) as ydl:
-                    info = ydl.extract_info(url, download=False)
-                    self.current_video_info = info
-                    callback_success(info)
+                with job.stage('extract_info'):
+                    info, streams_fresh = self.extract_info(url, job=job)
+                job.fields['video_id'] = info.get('id')
+                self.telemetry.finish(job, 'completed')
+                self.current_video_info = info
+                self.streams_expired = not streams_fresh
+                callback_success(info)
             except Exception as e:
+                self.telemetry.finish(job, 'error', str(e))
                 callback_error(str(e))
         
         threading.Thread(target=_thread, daemon=True).start()
 
+    def refresh_streams(self, callback_success, callback_error):
+        """Vuelve a extraer el video actual para renovar las URLs firmadas caducadas"""
+        if not self.current_video_info: return
+        url = self.current_video_info.get('webpage_url') or self.current_video_info.get('original_url')
+
+        def _thread():
+            try:
+                info, _ = self.extract_info(url, use_cache=False)
+                self.current_video_info = info
+                self.streams_expired = False
+                callback_success(info)
+            except Exception as e:
+                callback_error(str(e))
+
+        threading.Thread(target=_thread, daemon=True).start()
+
     def process_formats(self, mode):
         if not self.current_video_info: return [], None, None, {}
 
@@ -111,48 +218,77 @@ class DownloaderModel:
         title = info.get('title', 'Video')
         thumbnail_url = info.get('thumbnail', None)
         
-        # Preview Logic
-        self.preview_url = None
-        self.preview_formats = {}
-        formats_list = info.get('formats', [])
-        
-        for f in formats_list:
-            if f.get('vcodec') != 'none' and f.get('acodec') != 'none' and f.get('url'):
-                height = f.get('height', 0)
-                if height:
-                    label = f"{height}p"
-                    self.preview_formats[label] = f['url']
-
-        if '720p' in self.preview_formats:
-            self.preview_url = self.preview_formats['720p']
-        elif '360p' in self.preview_formats:
-            self.preview_url = self.preview_formats['360p']
-        elif self.preview_formats:
-            self.preview_url = list(self.preview_formats.values())[-1]
+        # La tabla de formatos se construye una vez por video y cachea cada modo
+        if self.format_table is None or self.format_table.info is not info:
+            self.format_table = FormatTable(info)
+        table = self.format_table
+
+        # Preview Logic: sin sondear la red; select_preview_url() afina la elección
+        self.preview_formats = dict(table.preview_formats())
+        hls_url = table.hls_manifest()
+        if hls_url:
+            self.preview_formats['Auto'] = hls_url
+        label = 'Auto' if hls_url else table.pick_preview(self.estimated_throughput())
+        self.preview_url = self.preview_formats.get(label)
 
         # Download Formats Logic
-        formats = []
-        if mode == "Audio":
-            formats.append(('best', {'label': '🎵 MP3 (Mejor)', 'format_id': 'bestaudio/best'}))
-        else:
-            formats.append(('auto', {'label': '🏆 Automático (Mejor)', 'format_id': 'bv*+ba/b'}))
-            for f in info.get('formats', []):
-                if f.get('height') and f.get('vcodec') != 'none':
-                    height = f['height']
-                    f_id = f['format_id']
-                    if f.get('acodec') == 'none': f_id = f"{f_id}+bestaudio"
-                    lbl = f"{height}p"
-                    formats.append((lbl, {'label': f"📺 {lbl}", 'format_id': f_id}))
-        
-        unique_formats = {}
-        formats.sort(key=lambda x: int(x[0].replace('p','')) if 'p' in x[0] else 99999, reverse=True)
-        for _, data in formats:
-            if data['label'] not in unique_formats: unique_formats[data['label']] = data
-        
-        self.available_formats = list(unique_formats.values())
+        self.available_formats = table.choices(mode)
         return self.available_formats, title, thumbnail_url, self.preview_formats
 
-    def add_to_queue(self, url, format_data, mode, filename, title, thumbnail_url):
+    def record_throughput(self, bytes_per_sec):
+        if bytes_per_sec and bytes_per_sec > 0:
+            self.throughput_samples.append((time.monotonic(), bytes_per_sec))
+
+    def estimated_throughput(self, max_age=600):
+        """Mediana de las velocidades medidas en los últimos max_age segundos (bytes/s)"""
+        now = time.monotonic()
+        recent = sorted(v for t, v in list(self.throughput_samples) if now - t <= max_age)
+        return recent[len(recent) // 2] if recent else None
+
+    def probe_throughput(self, url, nbytes=256 * 1024, timeout=3):
+        """Descarga los primeros nbytes de 'url' y mide la velocidad"""
+        import requests
+        try:
+            start = time.monotonic()
+            received = 0
+            with requests.get(url, headers={'Range': f'bytes=0-{nbytes - 1}'}, stream=True, timeout=timeout) as r:
+                r.raise_for_status()
+                for chunk in r.iter_content(64 * 1024):
+                    received += len(chunk)
+                    if received >= nbytes or time.monotonic() - start > timeout:
+                        break
+            elapsed = time.monotonic() - start
+            if received and elapsed > 0:
+                self.record_throughput(received / elapsed)
+                return received / elapsed
+        except requests.RequestException:
+            pass
+        return None
+
+    def select_preview_url(self):
+        """Elige la calidad inicial de la previsualización según el ancho de banda medido.
+
+        Prefiere el manifiesto HLS adaptativo; si no hay mediciones recientes, sondea
+        el stream progresivo más ligero. Puede bloquear unos segundos (usar en un hilo).
+        """
+        table = self.format_table
+        if not table: return self.preview_url
+        if 'Auto' in self.preview_formats:
+            self.preview_url = self.preview_formats['Auto']
+            return self.preview_url
+
+        throughput = self.estimated_throughput()
+        rows = table.preview_rows()
+        if throughput is None and rows:
+            lowest = min(rows.values(), key=lambda r: r['height'])
+            throughput = self.probe_throughput(lowest['url'])
+
+        label = table.pick_preview(throughput)
+        if label:
+            self.preview_url = self.preview_formats.get(label, self.preview_url)
+        return self.preview_url
+
+    def add_to_queue(self, url, format_data, mode, filename, title, thumbnail_url, video_id=None):
         item = {
             'url': url,
             'format_data': format_data,
@@ -160,45 +296,134 @@ class DownloaderModel:
             'filename': filename,
             'title': title,
             'thumbnail_url': thumbnail_url,
+            'video_id': video_id,
             'status': 'pending', # pending, downloading, completed, error
             'progress': 0
         }
-        self.download_queue.append(item)
-        return len(self.download_queue) - 1 # Return index
+        with self._queue_cond:
+            self.download_queue.append(item)
+            index = len(self.download_queue) - 1
+            # Si la cola ya está en marcha, el nuevo item entra directamente al pool
+            if self._queue_running:
+                self._pending_indices.append(index)
+                self._spawn_queue_workers()
+                self._queue_cond.notify()
+        self._save_queue()
+        return index
+
+    def _save_queue(self):
+        if self.queue_journal:
+            self.queue_journal.save(list(self.download_queue))
+
+    def reserve_output_stem(self, filename, mode, folder=None):
+        """Reserva un nombre de salida libre en la carpeta de descargas (seguro entre descargas paralelas)"""
+        ext = "mp3" if mode == "Audio" else "mp4"
+        return self.library_index.reserve_name(folder or self.download_path, filename, ext)
+
+    def release_output_stem(self, stem, mode, folder=None):
+        ext = "mp3" if mode == "Audio" else "mp4"
+        self.library_index.release_name(folder or self.download_path, stem, ext)
+
+    def _fragment_opts(self, mode):
+        defaults = FRAGMENT_DEFAULTS.get(mode, FRAGMENT_DEFAULTS['Video'])
+        return {
+            'concurrent_fragment_downloads': self._get_int_setting(
+                f"fragment_concurrency_{mode.lower()}", defaults['concurrent_fragment_downloads']),
+            # Descarga por rangos: evita el estrangulamiento de YouTube en streams grandes
+            'http_chunk_size': self._get_int_setting('http_chunk_size_mb', defaults['http_chunk_size_mb']) * MB,
+        }
+
+    def set_rate_limits(self, total_kbps, job_kbps):
+        """Cambia los límites de ancho de banda (KB/s, 0 = sin límite) y los guarda en config.json"""
+        self.rate_limit_total_kbps = max(0, int(total_kbps))
+        self.rate_limit_job_kbps = max(0, int(job_kbps))
+        self.bandwidth.set_limits(self.rate_limit_total_kbps * 1024, self.rate_limit_job_kbps * 1024)
+        self.config_data['rate_limit_total_kbps'] = self.rate_limit_total_kbps
+        self.config_data['rate_limit_job_kbps'] = self.rate_limit_job_kbps
+        self._write_config()
+
+    @diagnostics.profiled("download")
+    def _download_item(self, url, format_data, mode, filename, progress_callback, folder=None):
+        """Etapa de red de una descarga. Devuelve la etapa de postproceso (fusión, MP3,
+        limpieza) como una función aparte, para ejecutarla en el pool de postproceso"""
+        job_id = object()
+        bytes_lock = threading.Lock()
+        touched = set() # Archivos intermedios que escribió esta descarga (y solo esta)
+        outputs = []    # Rutas finales que reportan los postprocesadores
+        job = self.telemetry.start_job('download', url, mode=mode,
+                                       format_id=format_data['format_id'], filename=filename)
+        job.begin('extract') # Hasta el primer progreso: extracción y selección de formato
 
-    def _download_item_sync(self, url, format_data, mode, filename, progress_callback):
         def hook(d):
+            for key in ('filename', 'tmpfilename'):
+                name = d.get(key)
+                if name:
+                    with bytes_lock:
+                        touched.add(name)
+                        touched.add(name + '.ytdl')
+
             if d['status'] == 'downloading':
+                job.end('extract')
+                job.begin('download')
+                downloaded = d.get('downloaded_bytes', 0)
+                # downloaded_bytes es acumulado por archivo (video y audio van por separado)
+                delta = counter.delta(d.get('filename'), downloaded)
+                job.add_bytes(delta)
+                # Dormir dentro del hook frena la lectura del socket en este hilo
+                self.bandwidth.consume(job_id, delta)
+
+                self.record_throughput(d.get('speed'))
+
                 total = d.get('total_bytes') or d.get('total_bytes_estimate') or 1
-                p = d.get('downloaded_bytes', 0) / total
+                p = downloaded / total
                 if progress_callback:
                     progress_callback(p)
+            else:
+                job.end('extract')
+                job.end('download')
+
+        def pp_hook(d):
+            # Tiempo total de postproceso y de cada postprocesador (Merger, ExtractAudio...)
+            if d['status'] == 'started':
+                job.begin('postprocess')
+                job.begin(f"pp_{d.get('postprocessor')}")
+            elif d['status'] == 'finished':
+                job.end(f"pp_{d.get('postprocessor')}")
+                job.end('postprocess')
+
+            info = d.get('info_dict') or {}
+            filepath = info.get('filepath')
+            if not filepath: return
+            with bytes_lock:
+                if d['status'] == 'started':
+                    touched.add(filepath)
+                    touched.update(info.get('__files_to_merge') or [])
+                    # Temporales que FFmpeg escribe junto al archivo de entrada
+                    stem, ext = os.path.splitext(filepath)
+                    touched.add(f"{stem}.temp{ext}")
+                    touched.add(f"{stem}.orig{ext}")
+                elif d['status'] == 'finished':
+                    outputs.append(filepath)
         
-        path = self.download_path
-        
-        # Ensure unique filename to avoid skipping download
-        ext = "mp3" if mode == "Audio" else "mp4"
-        existing_files = set(os.listdir(path))
-        base_filename = filename
-        counter = 1
-        max_attempts = 1000
-        while f"{base_filename}.{ext}" in existing_files and counter < max_attempts:
-            base_filename = f"{filename} (#{counter})"
-            counter += 1
-        if counter >= max_attempts:
-            raise RuntimeError("Maximum attempts exceeded while generating a unique filename.")
+        path = folder or self.download_path # La carpeta donde se reservó el nombre
+        base_filename = filename # Ya reservado por quien llama
+        counter = ProgressCounter(path, base_filename) # Parte de los .part de un intento anterior
         
         opts = {
             'outtmpl': os.path.join(path, f'{base_filename}.%(ext)s'),
             'progress_hooks': [hook],
+            'postprocessor_hooks': [pp_hook],
+            'logger': RetryLogger(job), # Cuenta los reintentos de red
             'format': format_data['format_id'],
             'merge_output_format': 'mp4',
             'extractor_args': {'youtube': {'player_client': ['default']}},
             'keepvideo': False,
+            'continuedl': True, # Reanudar desde los .part de una sesión interrumpida
             'writethumbnail': True,
             'quiet': True,
             'no_warnings': True
         }
+        opts.update(self._fragment_opts(mode))
         
         ffmpeg_loc = self._get_ffmpeg_path()
         if ffmpeg_loc:
@@ -213,84 +438,241 @@ class DownloaderModel:
         else:
             opts['postprocessor_args'] = {'merger': ['-c:a', 'aac']}
 
-        import yt_dlp
-        with yt_dlp.YoutubeDL(opts) as ydl:
-            ydl.download([url])
+        from .postprocess import deferred_youtube_dl
+        ydl = None
+        try:
+            self.bandwidth.register(job_id)
+            try:
+                ydl = deferred_youtube_dl(opts)
+                ydl.download([url])
+            finally:
+                self.bandwidth.unregister(job_id)
+        except Exception as e:
+            if ydl: ydl.close()
+            self.telemetry.finish(job, 'error', str(e))
+            raise
+        job.begin('pp_queue') # Espera hasta que haya un hilo de postproceso libre
 
-        # Cleanup Logic
-        final_ext = ".mp3" if mode == "Audio" else ".mp4"
-        final_file = os.path.join(path, f"{base_filename}{final_ext}")
-        
-        if os.path.exists(final_file):
-            garbage_exts = ['.webm', '.m4a', '.part', '.ytdl', '.orig', '.temp.mp4']
+        @diagnostics.profiled("postprocess")
+        def postprocess():
+            job.end('pp_queue')
             try:
-                # Allow a short delay to ensure yt-dlp/ffmpeg and the filesystem
-                # have fully flushed and closed all related files before cleanup.
-                time.sleep(1)
-                for f in os.listdir(path):
-                    if f.startswith(base_filename):
-                        full_path = os.path.join(path, f)
-                        if full_path != final_file and not f.endswith(('.jpg', '.webp', '.png')):
-                            if any(f.endswith(ext) for ext in garbage_exts) or f.endswith(f".f{format_data['format_id']}.mp4"):
-                                try:
-                                    os.remove(full_path)
-                                except: pass
-            except: pass
+                try:
+                    ydl.run_post_process()
+                finally:
+                    ydl.close()
 
-    def process_queue(self, progress_callback, item_complete_callback, all_complete_callback, error_callback):
-        def _thread():
-            for i, item in enumerate(self.download_queue):
-                if item['status'] == 'completed': continue
-                
-                item['status'] = 'downloading'
+                # Limpieza: solo los intermedios registrados por los hooks de esta descarga
+                final_ext = ".mp3" if mode == "Audio" else ".mp4"
+                final_file = outputs[-1] if outputs else os.path.join(path, f"{base_filename}{final_ext}")
+
+                with job.stage('cleanup'):
+                    if os.path.exists(final_file):
+                        self.library_index.add_file(final_file)
+                        self._remove_leftovers(touched, keep=final_file)
+            except Exception as e:
+                self.telemetry.finish(job, 'error', str(e))
+                raise
+            self.telemetry.finish(job, 'completed')
+
+        return postprocess
+
+    def _remove_leftovers(self, paths, keep):
+        keep = os.path.normcase(os.path.abspath(keep))
+        for f in paths:
+            if os.path.normcase(os.path.abspath(f)) == keep or f.endswith(('.jpg', '.webp', '.png')):
+                continue
+            # En Windows ffmpeg puede tardar unos ms en soltar el archivo
+            for attempt in range(5):
                 try:
-                    # Wrapper for progress to include index
-                    def item_progress(p):
-                        item['progress'] = p
-                        progress_callback(i, p)
-                    
-                    self._download_item_sync(
-                        item['url'], 
-                        item['format_data'], 
-                        item['mode'], 
-                        item['filename'], 
-                        item_progress
-                    )
-                    
-                    item['status'] = 'completed'
-                    item['progress'] = 1.0
-                    item_complete_callback(i)
-                    
-                except Exception as e:
-                    item['status'] = 'error'
-                    error_callback(i, str(e))
-            
-            all_complete_callback()
-            # self.download_queue = [] 
+                    os.remove(f)
+                    break
+                except FileNotFoundError:
+                    break
+                except PermissionError:
+                    time.sleep(0.1 * (attempt + 1))
+                except OSError as e:
+                    print(f"No se pudo borrar {f}: {e}")
+                    break
 
-        threading.Thread(target=_thread, daemon=True).start()
+    def process_queue(self, progress_callback, item_complete_callback, all_complete_callback, error_callback):
+        """Procesa la cola con un pool de hasta max_concurrent_downloads descargas simultáneas.
+
+        Los callbacks reciben el índice del item igual que antes. Los items que se
+        agreguen mientras la cola está en marcha se procesan en la misma ejecución.
+        Un item se completa cuando termina su postproceso en postprocess_pool.
+        """
+        with self._queue_cond:
+            if self._queue_running or self._workers_alive:
+                return False
+            self._queue_callbacks = (progress_callback, item_complete_callback, all_complete_callback, error_callback)
+            self._pending_indices = deque(
+                i for i, item in enumerate(self.download_queue)
+                if item['status'] not in ('completed', 'downloading')
+            )
+            self._active_jobs = 0
+            self._busy_workers = 0
+            self._queue_running = True
+            self._spawn_queue_workers()
+            if not self._workers_alive:
+                # Cola vacía: un hilo igualmente, para que avise del final
+                self._start_queue_worker()
+        return True
+
+    def _spawn_queue_workers(self):
+        """Con _queue_cond tomado: un hilo más por item sin hilo libre, hasta max_concurrent_downloads"""
+        idle = self._workers_alive - self._busy_workers
+        missing = min(len(self._pending_indices) - idle, self.max_concurrent_downloads - self._workers_alive)
+        for _ in range(max(0, missing)):
+            self._start_queue_worker()
+
+    def _start_queue_worker(self):
+        self._workers_alive += 1
+        threading.Thread(target=self._queue_worker, daemon=True).start()
+
+    def is_queue_running(self):
+        with self._queue_cond:
+            return self._queue_running
+
+    def set_max_concurrent_downloads(self, value):
+        """Cambia las descargas simultáneas (también con la cola en marcha) y lo guarda en config.json"""
+        with self._queue_cond:
+            self.max_concurrent_downloads = max(1, int(value))
+            if self._queue_running:
+                self._spawn_queue_workers()
+            self._queue_cond.notify_all() # Los hilos que sobren terminan al quedar libres
+        self.config_data['max_concurrent_downloads'] = self.max_concurrent_downloads
+        self._write_config()
+
+    def _queue_worker(self):
+        while True:
+            with self._queue_cond:
+                # Mientras haya descargas activas, esperar: pueden llegar items nuevos
+                while (not self._pending_indices and self._active_jobs > 0
+                       and self._workers_alive <= self.max_concurrent_downloads):
+                    self._queue_cond.wait()
+                if not self._pending_indices and self._active_jobs == 0:
+                    self._queue_running = False
+                    self._queue_cond.notify_all()
+                    self._workers_alive -= 1
+                    is_last = self._workers_alive == 0
+                    callbacks = self._queue_callbacks
+                    break
+                if self._workers_alive > self.max_concurrent_downloads:
+                    # Sobra este hilo tras bajar el límite (nunca es el último)
+                    self._workers_alive -= 1
+                    return
+                index = self._pending_indices.popleft()
+                self._active_jobs += 1
+                self._busy_workers += 1
+
+            handed_off = False
+            try:
+                handed_off = self._run_queue_item(index)
+            finally:
+                # Si pasó al pool de postproceso, el item sigue activo hasta que termine allí
+                if not handed_off:
+                    self._end_queue_job()
+                with self._queue_cond:
+                    self._busy_workers -= 1
+
+        if is_last and callbacks:
+            callbacks[2]()
+
+    def _end_queue_job(self):
+        with self._queue_cond:
+            self._active_jobs -= 1
+            self._queue_cond.notify_all()
+
+    def _run_queue_item(self, i):
+        """Descarga el item y entrega su postproceso al pool. Devuelve True si lo entregó"""
+        progress_callback, item_complete_callback, _, error_callback = self._queue_callbacks
+        item = self.download_queue[i]
+        if item['status'] == 'completed': return False
+
+        item['status'] = 'downloading'
+        try:
+            # El nombre final y su carpeta se fijan una vez y se guardan, para que al reanudar
+            # tras un cierre yt-dlp encuentre los mismos archivos .part
+            if not item.get('output_stem'):
+                item['output_folder'] = self.download_path
+                item['output_stem'] = self.reserve_output_stem(item['filename'], item['mode'], item['output_folder'])
+            self._save_queue()
+
+            # Wrapper for progress to include index
+            def item_progress(p):
+                item['progress'] = p
+                progress_callback(i, p)
+
+            postprocess = self._download_item(
+                item['url'],
+                item['format_data'],
+                item['mode'],
+                item['output_stem'],
+                item_progress,
+                item['output_folder']
+            )
+        except Exception as e:
+            self._fail_queue_item(i, e)
+            return False
+
+        def _postprocess():
+            try:
+                postprocess()
+                item['status'] = 'completed'
+                item['progress'] = 1.0
+                # El archivo ya está en el índice; la reserva deja de hacer falta
+                self.release_output_stem(item['output_stem'], item['mode'], item['output_folder'])
+                self._save_queue()
+                item_complete_callback(i)
+            except Exception as e:
+                self._fail_queue_item(i, e)
+            finally:
+                self._end_queue_job()
+
+        self.postprocess_pool.submit(_postprocess)
+        return True
+
+    def _fail_queue_item(self, i, error):
+        item = self.download_queue[i]
+        item['status'] = 'error'
+        # El nombre y su reserva se conservan: al reintentar, yt-dlp reanuda los .part de este intento
+        self._save_queue()
+        self._queue_callbacks[3](i, str(error))
 
     def download_video(self, url, format_data, mode, filename, progress_callback, complete_callback, error_callback):
-        def _thread():
+        folder = self.download_path
+        stem = self.reserve_output_stem(filename, mode, folder)
+
+        def _postprocess(postprocess):
             try:
-                self._download_item_sync(url, format_data, mode, filename, progress_callback)
+                postprocess()
                 complete_callback()
             except Exception as e:
                 error_callback(str(e))
-        
+            finally:
+                self.release_output_stem(stem, mode, folder)
+
+        def _thread():
+            try:
+                postprocess = self._download_item(url, format_data, mode, stem, progress_callback, folder)
+            except Exception as e:
+                self.release_output_stem(stem, mode, folder)
+                error_callback(str(e))
+                return
+            self.postprocess_pool.submit(lambda: _postprocess(postprocess))
+
         threading.Thread(target=_thread, daemon=True).start()
 
-    def get_library_files(self):
-        exts = {'Video': ['.mp4', '.mkv', '.webm', '.avi'], 'Audio': ['.mp3', '.m4a', '.wav', '.flac']}
-        files = []
-        if os.path.exists(self.download_path):
-            for f in os.listdir(self.download_path):
-                fp = os.path.join(self.download_path, f)
-                if os.path.isfile(fp):
-                    ext = os.path.splitext(f)[1].lower()
-                    ftype = next((k for k, v in exts.items() if ext in v), None)
-                    if ftype: files.append({'name': f, 'path': fp, 'type': ftype})
-        return files
+    def get_library_files(self, cached_only=False):
+        """Archivos de la biblioteca desde el índice (cached_only evita tocar el disco)"""
+        return self.library_index.get_files(self.download_path, refresh=not cached_only)
+
+    def refresh_library_files(self):
+        """Sincroniza el índice con la carpeta. Devuelve (carpeta, archivos, cambió)"""
+        folder = self.download_path
+        files, changed = self.library_index.refresh(folder)
+        return folder, files, changed
 
     # --- NUEVO: Método de Actualización ---
     def update_ytdlp(self):
@@ -0,0 +1,17 @@
+import os
+
+
+def get_data_dir(*parts):
+    """Carpeta de datos persistentes de la app (cachés, índices, diagnósticos)"""
+    # YTD_DATA_DIR permite aislar los datos (benchmarks, pruebas manuales)
+    override = os.getenv('YTD_DATA_DIR')
+    if override:
+        path = os.path.join(override, *parts)
+    else:
+        base = os.getenv('LOCALAPPDATA') or os.path.join(os.path.expanduser("~"), ".local", "share")
+        path = os.path.join(base, "YT Downloader", *parts)
+    try:
+        os.makedirs(path, exist_ok=True)
+    except OSError:
+        pass
+    return path
@@ -1,57 +1,127 @@
 import customtkinter as ctk
 from tkinter import Frame, messagebox
+import ctypes
+import ctypes.util
 import os
 import sys
+import threading
 import time
+from . import startup
 
 # --- Configuración Robusta de VLC ---
-VLC_AVAILABLE = False
-try:
-    if sys.platform == "win32":
-        possible_vlc_paths = []
-        
-        # 1. Rutas Portables (Prioridad)
-        if getattr(sys, 'frozen', False):
-            # Si es un EXE compilado con PyInstaller
-            # Opción A: VLC embebido dentro del EXE (sys._MEIPASS)
-            possible_vlc_paths.append(os.path.join(sys._MEIPASS, 'vlc'))
-            # Opción B: VLC en carpeta junto al EXE
-            possible_vlc_paths.append(os.path.join(os.path.dirname(sys.executable), 'vlc'))
-        else:
-            # Entorno de desarrollo (script .py)
-            project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            possible_vlc_paths.append(os.path.join(project_root, 'vlc'))
-
-        # 2. Rutas de Instalación Estándar
-        possible_vlc_paths.extend([
-            r"C:\Program Files\VideoLAN\VLC",
-            r"C:\Program Files (x86)\VideoLAN\VLC",
-            os.path.join(os.getenv('LOCALAPPDATA', ''), 'Programs', 'VLC'),
-            r"C:\ProgramData\Microsoft\Windows\Start Menu\Programs\VideoLAN"
-        ])
-        
-        vlc_dir = None
-        for p in possible_vlc_paths:
-            if os.path.exists(os.path.join(p, "libvlc.dll")):
-                vlc_dir = p
-                break
-        
-        if vlc_dir:
-            os.environ["PATH"] = vlc_dir + ";" + os.environ["PATH"]
-            if hasattr(os, 'add_dll_directory'):
-                os.add_dll_directory(vlc_dir)
-            import vlc
-            instance = vlc.Instance()
-            instance.release()
-            VLC_AVAILABLE = True
-        else:
-            print("Aviso: No se encontró la instalación de VLC en rutas estándar.")
+# python-vlc y libvlc se cargan la primera vez que hacen falta (o en el warm-up tras el arranque)
+vlc = None
+VLC_AVAILABLE = None # None = aún sin comprobar
+_vlc_lock = threading.Lock()
+
+def _windows_vlc_dir():
+    possible_vlc_paths = []
+    
+    # 1. Rutas Portables (Prioridad)
+    if getattr(sys, 'frozen', False):
+        # Si es un EXE compilado con PyInstaller
+        # Opción A: VLC embebido dentro del EXE (sys._MEIPASS)
+        possible_vlc_paths.append(os.path.join(sys._MEIPASS, 'vlc'))
+        # Opción B: VLC en carpeta junto al EXE
+        possible_vlc_paths.append(os.path.join(os.path.dirname(sys.executable), 'vlc'))
     else:
-        import vlc
-        VLC_AVAILABLE = True
-except Exception as e:
-    print(f"Error inicializando motor de video: {e}")
-    VLC_AVAILABLE = False
+        # Entorno de desarrollo (script .py)
+        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        possible_vlc_paths.append(os.path.join(project_root, 'vlc'))
+
+    # 2. Rutas de Instalación Estándar
+    possible_vlc_paths.extend([
+        r"C:\Program Files\VideoLAN\VLC",
+        r"C:\Program Files (x86)\VideoLAN\VLC",
+        os.path.join(os.getenv('LOCALAPPDATA', ''), 'Programs', 'VLC'),
+        r"C:\ProgramData\Microsoft\Windows\Start Menu\Programs\VideoLAN"
+    ])
+    
+    for p in possible_vlc_paths:
+        if os.path.exists(os.path.join(p, "libvlc.dll")):
+            return p
+    return None
+
+def ensure_vlc():
+    """Carga python-vlc una sola vez. Devuelve True si el motor de video está disponible"""
+    global vlc, VLC_AVAILABLE
+    with _vlc_lock:
+        if VLC_AVAILABLE is not None:
+            return VLC_AVAILABLE
+        VLC_AVAILABLE = False
+        try:
+            if sys.platform == "win32":
+                vlc_dir = _windows_vlc_dir()
+                if not vlc_dir:
+                    print("Aviso: No se encontró la instalación de VLC en rutas estándar.")
+                    return False
+                os.environ["PATH"] = vlc_dir + ";" + os.environ["PATH"]
+                if hasattr(os, 'add_dll_directory'):
+                    os.add_dll_directory(vlc_dir)
+            # El import ya carga libvlc; si falla, no hay motor de video
+            vlc = startup.timed_import('vlc')
+            VLC_AVAILABLE = True
+        except Exception as e:
+            print(f"Error inicializando motor de video: {e}")
+        return VLC_AVAILABLE
+# ------------------------------------
+
+# --- Reparentado de la ventana nativa del video ---
+# Mover la ventana donde dibuja VLC a otro contenedor no interrumpe la decodificación
+_x11 = None
+
+def _x11_lib():
+    global _x11
+    if _x11 is None:
+        _x11 = False
+        path = ctypes.util.find_library('X11')
+        if path and os.environ.get('DISPLAY'):
+            lib = ctypes.cdll.LoadLibrary(path)
+            lib.XOpenDisplay.restype = ctypes.c_void_p
+            lib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+            lib.XReparentWindow.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_int, ctypes.c_int]
+            lib.XMoveResizeWindow.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.c_int, ctypes.c_uint, ctypes.c_uint]
+            lib.XRaiseWindow.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+            lib.XFlush.argtypes = [ctypes.c_void_p]
+            display = lib.XOpenDisplay(None)
+            if display:
+                _x11 = (lib, display)
+    return _x11
+
+def reparent_native(child_id, parent_id, width, height):
+    """Mueve la ventana nativa child_id dentro de parent_id ocupando todo su tamaño. Devuelve False si no es posible."""
+    try:
+        if sys.platform == "win32":
+            user32 = ctypes.windll.user32
+            if not user32.SetParent(child_id, parent_id):
+                return False
+            return bool(user32.MoveWindow(child_id, 0, 0, width, height, True))
+        if sys.platform.startswith('linux'):
+            x11 = _x11_lib()
+            if not x11:
+                return False
+            lib, display = x11
+            lib.XReparentWindow(display, child_id, parent_id, 0, 0)
+            lib.XMoveResizeWindow(display, child_id, 0, 0, max(1, width), max(1, height))
+            lib.XRaiseWindow(display, child_id)
+            lib.XFlush(display)
+            return True
+    except Exception as e:
+        print(f"Error moviendo la superficie de video: {e}")
+    return False
+
+def resize_native(window_id, width, height):
+    try:
+        if sys.platform == "win32":
+            ctypes.windll.user32.MoveWindow(window_id, 0, 0, width, height, True)
+        elif sys.platform.startswith('linux'):
+            x11 = _x11_lib()
+            if x11:
+                lib, display = x11
+                lib.XMoveResizeWindow(display, window_id, 0, 0, max(1, width), max(1, height))
+                lib.XFlush(display)
+    except Exception:
+        pass
 # ------------------------------------
 
 class MediaPlayerFrame(ctk.CTkFrame):
@@ -61,17 +131,33 @@ class MediaPlayerFrame(ctk.CTkFrame):
         self.instance = None
         self.player = None
         self.is_playing = False
-        self.update_timer = None
-        self.is_changing_quality = False # Flag para evitar conflictos durante el cambio
+        self.update_timer = None # Job de Tk que vacía los eventos de VLC (solo reproduciendo y visible)
+        self.ui_events = {} # Último valor de cada evento de VLC aún sin pintar
+        self.ui_events_lock = threading.Lock()
+        self.last_time_text = None
+        self.media_length = 0
         self.is_fullscreen = False
         self.hide_job = None
         self.restore_job = None # Job para restaurar estado tras switch_output
+        self.pending_player = None # Segundo reproductor que pre-carga la nueva calidad
+        self.switch_job = None
+        self.surface_host = None # Contenedor externo (mini player) que aloja ahora la superficie de video
+        self.surface_bindtags = None
+        self.hosts_bound = set()
         self.state_callback = None # Callback para notificar cambios de estado (play/pause)
         
         self.setup_ui()
+        self.bind("<Map>", self._on_map, add="+")
+        self.bind("<Unmap>", self._on_unmap, add="+")
 
     def set_state_callback(self, callback):
         self.state_callback = callback
+
+    def is_active(self):
+        """True si hay un video reproduciéndose, en pausa o cargando (no detenido ni terminado)"""
+        if not self.player: return False
+        return self.player.get_state() in (vlc.State.Playing, vlc.State.Paused,
+                                           vlc.State.Buffering, vlc.State.Opening)
         
     def setup_ui(self):
         # --- Cabecera Minimalista (Estilo Oscuro) ---
@@ -99,7 +185,12 @@ class MediaPlayerFrame(ctk.CTkFrame):
         
         # Frame nativo para VLC
         self.video_frame = Frame(self.video_container, bg="black")
-        self.video_frame.pack(fill="both", expand=True)
+        self.video_frame.place(relx=0, rely=0, relwidth=1, relheight=1)
+
+        # Superficie oculta (debajo de la principal) donde se pre-carga un cambio de calidad
+        self.video_frame_alt = Frame(self.video_container, bg="black")
+        self.video_frame_alt.place(relx=0, rely=0, relwidth=1, relheight=1)
+        self.video_frame_alt.lower(self.video_frame)
         
         # --- Barra de Controles (Estilo YouTube Moderno) ---
         self.controls_frame = ctk.CTkFrame(self, height=80, fg_color="#0f0f0f", corner_radius=0)
@@ -249,15 +340,19 @@ class MediaPlayerFrame(ctk.CTkFrame):
         return f"{minutes:02d}:{seconds:02d}"
 
     def load_media(self, uri, title="Video", formats=None):
+        # Un cambio de calidad a medias ya no aplica al nuevo video
+        self._cancel_pending_switch()
+
         # Cancelar restauración pendiente si existe (para evitar conflictos al cambiar video rápido)
         if self.restore_job:
             self.after_cancel(self.restore_job)
             self.restore_job = None
 
-        # Detener actualizaciones anteriores para evitar conflictos de UI
-        if self.update_timer:
-            self.after_cancel(self.update_timer)
-            self.update_timer = None
+        # Descartar eventos del video anterior para evitar conflictos de UI
+        with self.ui_events_lock:
+            self.ui_events = {}
+        self.media_length = 0
+        self.last_time_text = None
 
         self.title_label.configure(text=title)
         self.time_label.configure(text="00:00 / 00:00") # Resetear label
@@ -294,54 +389,105 @@ class MediaPlayerFrame(ctk.CTkFrame):
 
     def change_quality(self, value):
         if not self.current_formats or value not in self.current_formats: return
-        
-        self.is_changing_quality = True # Bloquear actualizaciones de UI
+        if not self.player or not self.instance: return
+        # Con el video en el mini player la superficie oculta no está a su lado
+        if self.surface_host: return
+
+        # Si había otro cambio en curso, descartarlo y empezar de nuevo
+        self._cancel_pending_switch()
         new_url = self.current_formats[value]
-        
-        # Guardar tiempo actual
-        current_time = 0
-        if self.player:
-            try:
-                current_time = self.player.get_time()
-                self.player.set_pause(1) # Pausar primero para liberar recursos
-            except: pass
-            
-        # Realizar el cambio con un pequeño delay para permitir que VLC procese el stop/pause
-        self.after(100, lambda: self._perform_quality_switch(new_url, current_time))
 
-    def _perform_quality_switch(self, url, start_time):
         try:
-            # Detener completamente
-            if self.player:
-                self.player.stop()
-            
-            # Crear nuevo media
-            media = self.instance.media_new(url)
-            self.player.set_media(media)
-            self.player.play()
-            
-            # Función recursiva para restaurar el tiempo una vez que empiece a reproducir
-            def restore_time(attempts=0):
-                if attempts > 20: # Timeout de 2 segundos
-                    self.is_changing_quality = False
-                    return
-
-                if self.player.is_playing():
-                    if start_time > 0:
-                        self.player.set_time(start_time)
-                    self.is_changing_quality = False
-                else:
-                    # Reintentar en 100ms
-                    self.after(100, lambda: restore_time(attempts + 1))
-            
-            self.after(200, restore_time)
-            
+            current_time = max(0, self.player.get_time())
+            self.pending_was_playing = self.is_playing
+
+            # El reproductor actual sigue en pantalla mientras el nuevo carga oculto y en silencio
+            alt = self.instance.media_player_new()
+            self._set_output(alt, self.video_frame_alt.winfo_id())
+            alt.video_set_mouse_input(False)
+            alt.video_set_key_input(False)
+            alt.audio_set_mute(True)
+
+            media = self.instance.media_new(new_url)
+            # Empezar un poco por delante: el actual sigue avanzando mientras se llena el buffer
+            media.add_option(f"start-time={current_time / 1000 + 1.0:.3f}")
+            alt.set_media(media)
+            alt.play()
+
+            self.pending_player = alt
+            self.switch_started = time.monotonic()
+            self.switch_job = self.after(100, self._check_prebuffer)
         except Exception as e:
             print(f"Error switching quality: {e}")
-            self.is_changing_quality = False
+            self._cancel_pending_switch()
+
+    def _set_output(self, player, widget_id):
+        if sys.platform == "win32":
+            player.set_hwnd(widget_id)
+        else:
+            player.set_xwindow(widget_id)
+
+    def _check_prebuffer(self):
+        self.switch_job = None
+        alt = self.pending_player
+        if not alt: return
+
+        state = alt.get_state()
+        if state in (vlc.State.Error, vlc.State.Ended) or time.monotonic() - self.switch_started > 10:
+            # La nueva calidad no cargó: seguir con la actual
+            print("Aviso: no se pudo pre-cargar la nueva calidad")
+            self._cancel_pending_switch()
+            return
+
+        alt.audio_set_mute(True)
+        if alt.is_playing() and alt.get_time() > 0:
+            self._swap_players()
+        else:
+            self.switch_job = self.after(100, self._check_prebuffer)
+
+    def _swap_players(self):
+        alt = self.pending_player
+        old = self.player
+        self.pending_player = None
+
+        # Alinear con el instante exacto del reproductor visible (ya está en el buffer)
+        current_time = old.get_time()
+        if current_time > 0 and abs(alt.get_time() - current_time) > 400:
+            alt.set_time(current_time)
+
+        muted = old.audio_get_mute()
+        alt.audio_set_volume(int(self.vol_slider.get()))
+        alt.audio_set_mute(bool(muted))
+
+        # Mostrar la nueva superficie y retirar la anterior
+        self.video_frame_alt.lift(self.video_frame)
+        self.video_frame, self.video_frame_alt = self.video_frame_alt, self.video_frame
+        self.player = alt
+        if self.is_fullscreen:
+            self.video_bind_id = self.video_frame.bind("<Motion>", self.on_mouse_move)
+
+        if not self.pending_was_playing:
+            alt.set_pause(1)
+
+        self._attach_events(alt)
+        self._detach_events(old)
+        old.stop()
+        old.release()
+
+    def _cancel_pending_switch(self):
+        if self.switch_job:
+            self.after_cancel(self.switch_job)
+            self.switch_job = None
+        if self.pending_player:
+            try:
+                self.pending_player.stop()
+                self.pending_player.release()
+            except Exception:
+                pass
+            self.pending_player = None
 
     def _init_player(self, uri):
-        if not VLC_AVAILABLE:
+        if not ensure_vlc():
             self.show_internal_error()
             return
 
@@ -363,14 +509,12 @@ class MediaPlayerFrame(ctk.CTkFrame):
                 self.instance = vlc.Instance(args)
                 self.player = self.instance.media_player_new()
                 
-                if sys.platform == "win32":
-                    self.player.set_hwnd(self.video_frame.winfo_id())
-                else:
-                    self.player.set_xwindow(self.video_frame.winfo_id())
+                self._set_output(self.player, self.video_frame.winfo_id())
                 
                 # Deshabilitar input de mouse en VLC para que Tkinter reciba los eventos
                 self.player.video_set_mouse_input(False)
                 self.player.video_set_key_input(False)
+                self._attach_events(self.player)
             else:
                 # Si ya existe, solo detenemos para cargar el nuevo media
                 self.player.stop()
@@ -378,9 +522,6 @@ class MediaPlayerFrame(ctk.CTkFrame):
             media = self.instance.media_new(uri)
             self.player.set_media(media)
             self.play()
-            
-            if not self.update_timer:
-                self.update_ui_loop()
         except Exception as e:
             print(f"Error VLC: {e}")
             self.show_internal_error()
@@ -394,6 +535,7 @@ class MediaPlayerFrame(ctk.CTkFrame):
             self.player.play()
             self.is_playing = True
             self.btn_play.configure(text="⏸")
+            self._schedule_ui_poll()
 
     def toggle_play(self):
         if not self.player: return
@@ -406,6 +548,7 @@ class MediaPlayerFrame(ctk.CTkFrame):
             self.btn_play.configure(text="⏸")
             if getattr(self, 'mini_play_btn', None): self.mini_play_btn.configure(text="⏸")
             self.is_playing = True
+            self._schedule_ui_poll()
             if self.state_callback: self.state_callback(True)
             return
         # ---------------------------------
@@ -415,12 +558,14 @@ class MediaPlayerFrame(ctk.CTkFrame):
             self.btn_play.configure(text="▶")
             if getattr(self, 'mini_play_btn', None): self.mini_play_btn.configure(text="▶")
             self.is_playing = False
+            self._cancel_ui_poll()
             if self.state_callback: self.state_callback(False)
         else:
             self.player.set_pause(0)
             self.btn_play.configure(text="⏸")
             if getattr(self, 'mini_play_btn', None): self.mini_play_btn.configure(text="⏸")
             self.is_playing = True
+            self._schedule_ui_poll()
             if self.state_callback: self.state_callback(True)
 
     def seek_delta(self, ms):
@@ -430,12 +575,12 @@ class MediaPlayerFrame(ctk.CTkFrame):
             new_time = current_time + ms
             if new_time < 0: new_time = 0
             self.player.set_time(new_time)
+            self._schedule_ui_poll() # En pausa pinta una vez la nueva posición
 
     def stop_and_close(self):
         """Cierra el reproductor completamente (Botón X)"""
-        if self.update_timer:
-            self.after_cancel(self.update_timer)
-        
+        self._cancel_pending_switch()
+
         # Detener explícitamente
         if self.player:
             self.player.stop()
@@ -443,6 +588,7 @@ class MediaPlayerFrame(ctk.CTkFrame):
             # self.player.set_media(None) # Esto a veces causa crash en VLC, mejor confiar en stop()
         
         self.is_playing = False
+        self._cancel_ui_poll()
         
         # Salir de pantalla completa si está activa
         if self.is_fullscreen:
@@ -459,9 +605,11 @@ class MediaPlayerFrame(ctk.CTkFrame):
 
     def stop(self):
         """Detiene la reproducción sin cerrar el frame (usado por Mini Player)"""
+        self._cancel_pending_switch()
         if self.player:
             self.player.stop()
         self.is_playing = False
+        self._cancel_ui_poll()
         self.btn_play.configure(text="▶")
         if getattr(self, 'mini_play_btn', None):
             self.mini_play_btn.configure(text="▶")
@@ -472,20 +620,49 @@ class MediaPlayerFrame(ctk.CTkFrame):
         self.mini_progress_bar = progress_bar
         self.mini_play_btn = play_btn
 
-    def switch_output(self, widget_id):
+    def switch_output(self, host, bind_tag=None):
+        """Muestra el video dentro de host (o de vuelta en video_container) sin reiniciar la reproducción"""
         if not self.player: return
-        
+        # Un cambio de calidad a medias cambiaría de superficie con la actual ya movida a otro contenedor
+        self._cancel_pending_switch()
+        host.update_idletasks()
+        surface = self.video_frame
+        width, height = host.winfo_width(), host.winfo_height()
+
+        if reparent_native(surface.winfo_id(), host.winfo_id(), width, height):
+            if host is self.video_container:
+                self.surface_host = None
+                if self.surface_bindtags:
+                    surface.bindtags(self.surface_bindtags)
+                    self.surface_bindtags = None
+            else:
+                self.surface_host = host
+                # Los clics sobre el video deben llegar a los manejadores del contenedor externo
+                if bind_tag:
+                    if not self.surface_bindtags:
+                        self.surface_bindtags = surface.bindtags()
+                    surface.bindtags((str(surface), bind_tag) + self.surface_bindtags[1:])
+                if host not in self.hosts_bound:
+                    self.hosts_bound.add(host)
+                    host.bind("<Configure>", lambda e, h=host: self._fit_surface(h), add="+")
+            return
+
+        # Sin reparentado nativo: cambiar la ventana de salida de VLC (requiere stop/play)
+        target_id = self.video_frame.winfo_id() if host is self.video_container else host.winfo_id()
+        self._restart_output(target_id)
+
+    def _fit_surface(self, host):
+        if self.surface_host is host:
+            resize_native(self.video_frame.winfo_id(), host.winfo_width(), host.winfo_height())
+
+    def _restart_output(self, widget_id):
         # Guardar estado
         t = self.player.get_time()
         was_playing = self.player.is_playing()
         
         # Cambiar ventana de salida (requiere stop/play en la mayoría de plataformas)
         self.player.stop()
-        if sys.platform == "win32":
-            self.player.set_hwnd(widget_id)
-        else:
-            self.player.set_xwindow(widget_id)
-            
+        self._set_output(self.player, widget_id)
         self.player.play()
         
         # Restaurar estado
@@ -499,6 +676,7 @@ class MediaPlayerFrame(ctk.CTkFrame):
                 self.btn_play.configure(text="⏸")
                 if getattr(self, 'mini_play_btn', None):
                     self.mini_play_btn.configure(text="⏸")
+                self._schedule_ui_poll()
             self.restore_job = None
 
         self.restore_job = self.after(100, restore)
@@ -522,33 +700,116 @@ class MediaPlayerFrame(ctk.CTkFrame):
                 self.is_playing = True
             else:
                 self.player.set_position(value / 100)
+            self._schedule_ui_poll()
             # ----------------------------------------------------------
 
-    def update_ui_loop(self):
-        if self.player and not self.is_changing_quality:
-            # --- NUEVO: Detectar fin natural del video ---
-            if self.player.get_state() == vlc.State.Ended and self.is_playing:
-                self.is_playing = False
-                self.btn_play.configure(text="▶") # Cambiar icono a Play
-                self.time_slider.set(100) # Poner barra al final
-            # ---------------------------------------------
-
-            if self.player.is_playing():
-                try:
-                    # Actualizar Slider
-                    pos = self.player.get_position() * 100
-                    self.time_slider.set(pos)
-                    
-                    # Actualizar Label de Tiempo
-                    current_ms = self.player.get_time()
-                    total_ms = self.player.get_length()
-                    
-                    if total_ms > 0:
-                        time_str = f"{self.format_ms(current_ms)} / {self.format_ms(total_ms)}"
-                        self.time_label.configure(text=time_str)
-                    
-                except: pass
-        self.update_timer = self.after(1000, self.update_ui_loop)
+    # --- Eventos de VLC ---
+    # VLC avisa desde su propio hilo; los valores se acumulan y Tk los recoge con un sondeo propio.
+    # El callback de VLC nunca llama a Tk: un after() desde ese hilo espera al hilo principal,
+    # y si este está dentro de player.stop() (que espera al hilo de eventos) ambos se bloquean.
+    UI_EVENT_INTERVAL = 100 # ms entre repintados como máximo
+
+    def _attach_events(self, player):
+        em = player.event_manager()
+        for event_type in self._ui_event_types():
+            em.event_attach(event_type, self._on_vlc_event, player)
+
+    def _detach_events(self, player):
+        try:
+            em = player.event_manager()
+            for event_type in self._ui_event_types():
+                em.event_detach(event_type)
+        except Exception:
+            pass
+
+    def _ui_event_types(self):
+        ev = vlc.EventType
+        return (ev.MediaPlayerTimeChanged, ev.MediaPlayerPositionChanged,
+                ev.MediaPlayerLengthChanged, ev.MediaPlayerEndReached)
+
+    def _on_vlc_event(self, event, player):
+        # Hilo de VLC: no tocar widgets ni llamar a la API del reproductor aquí
+        ev = vlc.EventType
+        if event.type == ev.MediaPlayerTimeChanged:
+            key, value = 'time', event.u.new_time
+        elif event.type == ev.MediaPlayerPositionChanged:
+            key, value = 'position', event.u.new_position
+        elif event.type == ev.MediaPlayerLengthChanged:
+            key, value = 'length', event.u.new_length
+        else:
+            key, value = 'ended', True
+
+        with self.ui_events_lock:
+            self.ui_events[key] = (player, value)
+
+    def _schedule_ui_poll(self):
+        # Sin reproducir (pausa, fin, detenido) el sondeo hace una pasada más y se detiene
+        if not self.update_timer and self.winfo_ismapped():
+            self.update_timer = self.after(self.UI_EVENT_INTERVAL, self._poll_ui_events)
+
+    def _cancel_ui_poll(self):
+        if self.update_timer:
+            self.after_cancel(self.update_timer)
+            self.update_timer = None
+
+    def _poll_ui_events(self):
+        self.update_timer = None
+        if not self.winfo_exists(): return
+        self._flush_ui_events()
+        # Solo se re-arma mientras se reproduce y el frame es visible (EndReached pone is_playing a False)
+        if self.is_playing and self.winfo_ismapped():
+            self.update_timer = self.after(self.UI_EVENT_INTERVAL, self._poll_ui_events)
+
+    def _on_unmap(self, event=None):
+        # Oculto (otra vista o mini player): nada que repintar; _on_map pinta el estado al volver
+        if event is not None and event.widget is not self: return
+        self._cancel_ui_poll()
+
+    def _on_map(self, event=None):
+        # Al volver a mostrarse, pintar el estado actual una vez (mientras estaba oculto no se repintó)
+        if event is not None and event.widget is not self: return
+        if not self.player: return
+        try:
+            with self.ui_events_lock:
+                self.ui_events['position'] = (self.player, self.player.get_position())
+                self.ui_events['time'] = (self.player, self.player.get_time())
+        except Exception:
+            return
+        self._flush_ui_events()
+        self._schedule_ui_poll()
+
+    def _flush_ui_events(self):
+        with self.ui_events_lock:
+            if not self.ui_events: return
+            events = self.ui_events
+            self.ui_events = {}
+
+        # Ignorar eventos de un reproductor que ya no es el visible (pre-carga o uno liberado)
+        events = {k: v for k, (p, v) in events.items() if p is self.player}
+        if not events: return
+
+        if 'length' in events:
+            self.media_length = events['length']
+
+        if events.get('ended') and self.is_playing:
+            self.is_playing = False
+            self.btn_play.configure(text="▶") # Cambiar icono a Play
+            if getattr(self, 'mini_play_btn', None): self.mini_play_btn.configure(text="▶")
+            self.time_slider.set(100) # Poner barra al final
+            return
+
+        # Oculto (otra vista o mini player sin controles): no repintar nada
+        if not self.winfo_ismapped(): return
+
+        if 'position' in events:
+            self.time_slider.set(events['position'] * 100)
+
+        total_ms = self.media_length
+        if 'time' in events and total_ms > 0:
+            time_str = f"{self.format_ms(events['time'])} / {self.format_ms(total_ms)}"
+            if time_str != self.last_time_text:
+                self.last_time_text = time_str
+                self.time_label.configure(text=time_str)
 
     def toggle_fullscreen(self):
         self.is_fullscreen = not self.is_fullscreen
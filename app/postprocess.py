@@ -0,0 +1,101 @@
+import os
+import threading
+from collections import deque
+
+
+def default_workers():
+    """FFmpeg usa casi un núcleo por trabajo: dejar uno libre para la red y la interfaz"""
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+class PostProcessPool:
+    """Pool acotado de hilos para el postproceso (fusión, conversión a MP3, miniaturas).
+
+    Las descargas le entregan su postproceso y siguen con el siguiente item, así la
+    red no queda parada mientras FFmpeg codifica el anterior. Si hay más de
+    max_pending trabajos en espera, submit() bloquea: la cola no acumula más
+    intermedios en disco de los que FFmpeg puede procesar.
+    """
+
+    IDLE_TIMEOUT = 30 # s; los hilos sin trabajo terminan
+
+    def __init__(self, workers, max_pending=None):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending or self.workers * 2
+        self._cond = threading.Condition()
+        self._tasks = deque()
+        self._threads = 0
+        self._idle = 0
+
+    def submit(self, task):
+        with self._cond:
+            while len(self._tasks) >= self.max_pending:
+                self._cond.wait()
+            self._tasks.append(task)
+            if len(self._tasks) > self._idle and self._threads < self.workers:
+                self._threads += 1
+                threading.Thread(target=self._worker, daemon=True).start()
+            self._cond.notify_all()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._idle += 1
+                if not self._tasks:
+                    self._cond.wait(self.IDLE_TIMEOUT)
+                self._idle -= 1
+                if not self._tasks:
+                    self._threads -= 1
+                    return
+                task = self._tasks.popleft()
+                self._cond.notify_all() # Hay hueco para quien espera en submit()
+
+            try:
+                task()
+            except Exception as e:
+                print(f"Error en postproceso: {e}")
+
+
+class _DeferredPostProcess:
+    """Mixin para YoutubeDL: guarda el postproceso en vez de ejecutarlo tras la descarga.
+
+    Limitación: process_info da el archivo por terminado en cuanto post_process vuelve,
+    así que los post_hooks (add_post_hook) y la marca para download_archive se aplican
+    antes del postproceso real y no se enteran si este falla después. La app no usa
+    ninguno de los dos; quien los necesite debe comprobar el resultado de run_post_process.
+    """
+
+    def post_process(self, filename, info, files_to_move=None):
+        if not hasattr(self, '_deferred_pp'):
+            self._deferred_pp = []
+        self._deferred_pp.append((filename, info, files_to_move))
+        info['filepath'] = filename
+        return info
+
+    def run_post_process(self):
+        """Ejecuta los postprocesadores pendientes (en el hilo de quien llama)"""
+        from yt_dlp.utils import PostProcessingError
+        pending, self._deferred_pp = getattr(self, '_deferred_pp', []), []
+        for filename, info, files_to_move in pending:
+            try:
+                # Mismo efecto que en process_info: el info dict se actualiza en sitio
+                result = super().post_process(filename, info, files_to_move)
+                if result is not info:
+                    info.clear()
+                    info.update(result)
+            except PostProcessingError as err:
+                self.report_error(f'Postprocessing: {err}') # Lanza DownloadError, como antes
+
+
+_classes = {}
+
+
+def deferred_youtube_dl(params):
+    """YoutubeDL con el postproceso diferido; se deriva de yt_dlp.YoutubeDL en el momento de
+    la llamada para respetar a quien lo haya sustituido (p. ej. los benchmarks)"""
+    import yt_dlp
+    base = yt_dlp.YoutubeDL
+    cls = _classes.get(base)
+    if cls is None:
+        cls = _classes[base] = type(f"Deferred{base.__name__}", (_DeferredPostProcess, base), {})
+    return cls(params)
@@ -0,0 +1,48 @@
+import threading
+
+
+class ProgressChannel:
+    """Agrupa actualizaciones de progreso por trabajo y las entrega a Tk a ritmo fijo.
+
+    Los hilos de descarga llaman a post() tantas veces como quieran; solo el último
+    valor de cada trabajo sobrevive y flush_callback recibe un dict {clave: progreso}
+    una vez por fotograma desde el hilo principal.
+    """
+
+    def __init__(self, widget, flush_callback, fps=15):
+        self.widget = widget
+        self.flush_callback = flush_callback
+        self.interval_ms = max(1, int(1000 / fps))
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_sent = {}
+        self._scheduled = False
+
+    def post(self, key, progress):
+        with self._lock:
+            self._pending[key] = progress
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.widget.after(self.interval_ms, self._flush)
+
+    def discard(self, key):
+        """Descarta el progreso pendiente de un trabajo (p.ej. al completarse)"""
+        with self._lock:
+            self._pending.pop(key, None)
+            self._last_sent.pop(key, None)
+
+    def _flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._scheduled = False
+
+        updates = {}
+        for key, progress in pending.items():
+            # Solo repintar si cambia el porcentaje visible
+            if int(progress * 100) != self._last_sent.get(key):
+                self._last_sent[key] = int(progress * 100)
+                updates[key] = progress
+
+        if updates:
+            self.flush_callback(updates)
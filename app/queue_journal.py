@@ -0,0 +1,49 @@
+import json
+import os
+import threading
+
+from .paths import get_data_dir
+
+# Campos de cada item que sobreviven a un reinicio
+_FIELDS = ('url', 'format_data', 'mode', 'filename', 'output_stem', 'output_folder', 'title',
+           'thumbnail_url', 'video_id', 'status')
+
+
+class QueueJournal:
+    """Copia en disco de la cola de descargas, reemplazada de forma atómica en cada cambio"""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_data_dir(), "queue.json")
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Items pendientes de la sesión anterior; los interrumpidos vuelven a 'pending'"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return []
+
+        items = []
+        for saved in data.get('items', []) if isinstance(data, dict) else []:
+            if not isinstance(saved, dict) or not saved.get('url') or saved.get('status') == 'completed':
+                continue
+            item = {key: saved.get(key) for key in _FIELDS}
+            if item['status'] not in ('pending', 'error'):
+                item['status'] = 'pending'
+            item['progress'] = 0
+            items.append(item)
+        return items
+
+    def save(self, items):
+        snapshot = {'version': 1, 'items': [{key: item.get(key) for key in _FIELDS} for item in items]}
+        with self._lock:
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Error guardando la cola: {e}")
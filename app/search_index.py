@@ -0,0 +1,53 @@
+import unicodedata
+from array import array
+
+
+def normalize(text):
+    """Minúsculas y sin acentos: 'Canción' -> 'cancion'"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class LibrarySearchIndex:
+    """Índice de trigramas sobre los nombres normalizados de la biblioteca.
+
+    Una búsqueda toma la lista de apariciones más corta entre los trigramas de sus
+    palabras y solo verifica esos candidatos, así que su coste depende de lo
+    selectiva que sea la consulta y no del tamaño de la biblioteca.
+    """
+
+    def __init__(self, items=()):
+        self.items = list(items)
+        self.names = [normalize(item['name']) for item in self.items]
+        self.postings = {}
+        for i, name in enumerate(self.names):
+            for gram in _trigrams(name):
+                posting = self.postings.get(gram)
+                if posting is None:
+                    posting = self.postings[gram] = array('I')
+                posting.append(i)
+
+    def search(self, query):
+        tokens = normalize(query).split()
+        if not tokens:
+            return self.items
+
+        best = None
+        for token in tokens:
+            for gram in _trigrams(token):
+                posting = self.postings.get(gram)
+                if posting is None:
+                    return []
+                if best is None or len(posting) < len(best):
+                    best = posting
+
+        names = self.names
+        # Palabras de menos de 3 letras no tienen trigramas: se recorre todo
+        ids = best if best is not None else range(len(names))
+        for token in sorted(tokens, key=len, reverse=True):
+            ids = [i for i in ids if token in names[i]]
+        return [self.items[i] for i in ids]
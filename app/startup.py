@@ -0,0 +1,71 @@
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+
+# Instante de referencia: main.py importa este módulo antes que nada
+START = time.perf_counter()
+
+_lock = threading.Lock()
+_imports = {} # módulo -> segundos que tardó su import (0 si ya estaba cargado)
+_marks = {}   # etapa -> segundos desde START
+
+
+def timed_import(name):
+    """Importa un módulo registrando cuánto tarda"""
+    already = name in sys.modules
+    t = time.perf_counter()
+    module = importlib.import_module(name)
+    elapsed = 0.0 if already else time.perf_counter() - t
+    with _lock:
+        _imports.setdefault(name, elapsed)
+    return module
+
+
+def mark(stage):
+    with _lock:
+        _marks.setdefault(stage, time.perf_counter() - START)
+
+
+def report():
+    """Resumen de tiempos; se imprime con YTD_STARTUP_REPORT=1 y se guarda en startup.json"""
+    with _lock:
+        data = {
+            'imports_ms': {k: round(v * 1000, 1) for k, v in _imports.items()},
+            'stages_ms': {k: round(v * 1000, 1) for k, v in sorted(_marks.items(), key=lambda kv: kv[1])},
+        }
+
+    if os.environ.get('YTD_STARTUP_REPORT') == '1':
+        print("--- Arranque ---")
+        for stage, ms in data['stages_ms'].items():
+            print(f"{stage:<24}{ms:>9.1f} ms")
+        for name, ms in sorted(data['imports_ms'].items(), key=lambda kv: -kv[1]):
+            print(f"  import {name:<17}{ms:>9.1f} ms")
+
+    try:
+        from .paths import get_data_dir
+        with open(os.path.join(get_data_dir(), "startup.json"), 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+    except OSError as e:
+        print(f"Error guardando tiempos de arranque: {e}")
+    return data
+
+
+def warm_up(modules, on_done=None):
+    """Importa en segundo plano lo que no hace falta para pintar la primera ventana"""
+    def _run():
+        for name in modules:
+            try:
+                if callable(name):
+                    name()
+                else:
+                    timed_import(name)
+            except Exception as e:
+                print(f"Aviso: no se pudo precargar {name}: {e}")
+        mark('warm_up_done')
+        if on_done:
+            on_done()
+
+    threading.Thread(target=_run, daemon=True).start()
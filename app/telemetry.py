@@ -0,0 +1,226 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from .paths import get_data_dir
+
+
+class JobMetrics:
+    """Tiempos por etapa, bytes, velocidad y reintentos de una operación (análisis o descarga)"""
+
+    PEAK_WINDOW = 0.5 # s; la velocidad máxima se mide en ventanas de este tamaño
+
+    def __init__(self, kind, url, **fields):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.url = url
+        self.fields = fields
+        self.started = time.time()
+        self.stages = {}  # etapa -> segundos acumulados
+        self._open = {}   # etapa -> instante de inicio
+        self.bytes = 0
+        self.peak_bps = 0
+        self._window = (time.perf_counter(), 0) # (inicio, bytes) de la ventana de medición actual
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def begin(self, stage):
+        with self._lock:
+            self._open.setdefault(stage, time.perf_counter())
+
+    def end(self, stage):
+        with self._lock:
+            start = self._open.pop(stage, None)
+            if start is not None:
+                self.stages[stage] = self.stages.get(stage, 0) + time.perf_counter() - start
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def add_bytes(self, nbytes):
+        with self._lock:
+            self.bytes += max(0, nbytes)
+            now = time.perf_counter()
+            start, window_bytes = self._window
+            window_bytes += max(0, nbytes)
+            if now - start >= self.PEAK_WINDOW:
+                self.peak_bps = max(self.peak_bps, window_bytes / (now - start))
+                self._window = (now, 0)
+            else:
+                self._window = (start, window_bytes)
+
+    def count_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def to_record(self, status, error=None):
+        with self._lock:
+            # Etapas que quedaron abiertas (p. ej. por un error) se cierran aquí
+            now = time.perf_counter()
+            for stage, start in self._open.items():
+                self.stages[stage] = self.stages.get(stage, 0) + now - start
+            self._open.clear()
+            download = self.stages.get('download', 0)
+            avg_bps = self.bytes / download if download > 0 else 0
+            return {
+                'id': self.id,
+                'ts': round(self.started, 3),
+                'kind': self.kind,
+                'url': self.url,
+                **self.fields,
+                'status': status,
+                'error': error,
+                'stages_ms': {k: round(v * 1000, 1) for k, v in self.stages.items()},
+                'total_ms': round((time.time() - self.started) * 1000, 1),
+                'bytes': self.bytes,
+                'avg_bps': round(avg_bps),
+                # Descargas más cortas que una ventana: la media es la mejor estimación
+                'peak_bps': round(max(self.peak_bps, avg_bps)),
+                'retries': self.retries,
+            }
+
+
+class _Stage:
+    def __init__(self, job, name):
+        self.job = job
+        self.name = name
+
+    def __enter__(self):
+        self.job.begin(self.name)
+        return self
+
+    def __exit__(self, *exc):
+        self.job.end(self.name)
+
+
+class RetryLogger:
+    """Logger para yt-dlp: cuenta los reintentos y mantiene el modo silencioso"""
+
+    def __init__(self, job):
+        self.job = job
+
+    def _check(self, msg):
+        if 'Retrying' in msg:
+            self.job.count_retry()
+
+    def debug(self, msg):
+        self._check(msg)
+
+    def info(self, msg):
+        self._check(msg)
+
+    def warning(self, msg):
+        self._check(msg)
+
+    def error(self, msg):
+        print(msg)
+
+
+class Telemetry:
+    """Registro de métricas por trabajo: metrics.jsonl (una línea por trabajo) y metrics.prom (Prometheus)"""
+
+    MAX_JSONL_BYTES = 5 * 1024 * 1024 # Al superarlo, metrics.jsonl pasa a metrics.jsonl.1 (se guarda uno)
+
+    def __init__(self, folder=None, keep=200):
+        self.folder = folder or get_data_dir("metrics")
+        os.makedirs(self.folder, exist_ok=True)
+        self.jsonl_path = os.path.join(self.folder, "metrics.jsonl")
+        self.prom_path = os.path.join(self.folder, "metrics.prom")
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=keep)
+        self._jobs = {}          # (tipo, estado) -> cantidad
+        self._stage_sum = {}     # etapa -> segundos
+        self._stage_count = {}
+        self._bytes = 0
+        self._retries = 0
+        self._last_avg_bps = 0
+        self._last_peak_bps = 0
+
+    def start_job(self, kind, url, **fields):
+        return JobMetrics(kind, url, **fields)
+
+    def finish(self, job, status, error=None):
+        record = job.to_record(status, error)
+        with self._lock:
+            self.recent.appendleft(record)
+            key = (record['kind'], status)
+            self._jobs[key] = self._jobs.get(key, 0) + 1
+            for stage, ms in record['stages_ms'].items():
+                self._stage_sum[stage] = self._stage_sum.get(stage, 0) + ms / 1000
+                self._stage_count[stage] = self._stage_count.get(stage, 0) + 1
+            self._bytes += record['bytes']
+            self._retries += record['retries']
+            if record['kind'] == 'download' and record['bytes']:
+                self._last_avg_bps = record['avg_bps']
+                self._last_peak_bps = record['peak_bps']
+            try:
+                self._rotate_jsonl()
+                with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._write_prom()
+            except OSError as e:
+                print(f"Error guardando métricas: {e}")
+        return record
+
+    def _rotate_jsonl(self):
+        try:
+            if os.path.getsize(self.jsonl_path) < self.MAX_JSONL_BYTES:
+                return
+        except OSError:
+            return
+        os.replace(self.jsonl_path, self.jsonl_path + ".1")
+
+    def _write_prom(self):
+        lines = [
+            "# HELP ytd_jobs_total Trabajos terminados por tipo y estado.",
+            "# TYPE ytd_jobs_total counter",
+        ]
+        for (kind, status), count in sorted(self._jobs.items()):
+            lines.append(f'ytd_jobs_total{{kind="{kind}",status="{status}"}} {count}')
+        lines += [
+            "# HELP ytd_stage_seconds Tiempo por etapa de los trabajos.",
+            "# TYPE ytd_stage_seconds summary",
+        ]
+        for stage in sorted(self._stage_sum):
+            lines.append(f'ytd_stage_seconds_sum{{stage="{stage}"}} {self._stage_sum[stage]:.6f}')
+            lines.append(f'ytd_stage_seconds_count{{stage="{stage}"}} {self._stage_count[stage]}')
+        lines += [
+            "# HELP ytd_downloaded_bytes_total Bytes descargados.",
+            "# TYPE ytd_downloaded_bytes_total counter",
+            f"ytd_downloaded_bytes_total {self._bytes}",
+            "# HELP ytd_retries_total Reintentos de red informados por yt-dlp.",
+            "# TYPE ytd_retries_total counter",
+            f"ytd_retries_total {self._retries}",
+            "# HELP ytd_last_download_avg_bytes_per_second Velocidad media de la última descarga.",
+            "# TYPE ytd_last_download_avg_bytes_per_second gauge",
+            f"ytd_last_download_avg_bytes_per_second {self._last_avg_bps}",
+            "# HELP ytd_last_download_peak_bytes_per_second Velocidad máxima de la última descarga.",
+            "# TYPE ytd_last_download_peak_bytes_per_second gauge",
+            f"ytd_last_download_peak_bytes_per_second {self._last_peak_bps}",
+        ]
+        # Escritura atómica: quien lo lea nunca ve un archivo a medias
+        tmp_path = self.prom_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prom_path)
+
+    def summary(self):
+        """Totales de esta sesión para el panel de estadísticas"""
+        with self._lock:
+            downloads = [r for r in self.recent if r['kind'] == 'download' and r['status'] == 'completed']
+            return {
+                'jobs': sum(self._jobs.values()),
+                'errors': sum(c for (_, status), c in self._jobs.items() if status == 'error'),
+                'bytes': self._bytes,
+                'retries': self._retries,
+                'avg_bps': round(sum(r['avg_bps'] for r in downloads) / len(downloads)) if downloads else 0,
+                'stage_avg_ms': {s: round(self._stage_sum[s] * 1000 / self._stage_count[s], 1)
+                                 for s in self._stage_sum},
+            }
+
+    def recent_jobs(self, limit=50):
+        with self._lock:
+            return list(self.recent)[:limit]
@@ -0,0 +1,172 @@
+import heapq
+import itertools
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageOps
+
+from .thumbnail_store import VARIANTS
+
+THUMB_EXTS = ('.jpg', '.webp', '.png')
+
+
+def find_sidecar_thumbnail(media_path):
+    """Busca la miniatura que yt-dlp guarda junto al archivo (writethumbnail)"""
+    base_path = os.path.splitext(media_path)[0]
+    for ext in THUMB_EXTS:
+        if os.path.exists(base_path + ext):
+            return base_path + ext
+    return None
+
+
+def decode_thumbnail(path, size):
+    """Decodifica una imagen reducida a 'size' usando draft/reduce para no decodificarla completa"""
+    width, height = size
+    with Image.open(path) as img:
+        # JPEG: el decodificador escala en el dominio DCT (1/2, 1/4, 1/8)
+        img.draft('RGB', (width * 2, height * 2))
+        # reduce() y fit() fallan con paleta ("P") o 16 bits ("I;16"): pasar a RGB/RGBA
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert("RGBA" if "A" in img.getbands() or img.mode == "P" else "RGB")
+        factor = min(img.width // (width * 2), img.height // (height * 2))
+        if factor > 1:
+            img = img.reduce(factor)
+        else:
+            img.load()
+        return ImageOps.fit(img, (width, height), Image.Resampling.BILINEAR)
+
+
+class _Job:
+    __slots__ = ('key', 'path', 'variant', 'store_key', 'callback', 'group', 'cancelled')
+
+    def __init__(self, key, path, variant, store_key, callback, group):
+        self.key = key
+        self.path = path
+        self.variant = variant
+        self.store_key = store_key
+        self.callback = callback
+        self.group = group
+        self.cancelled = False
+
+
+class ThumbnailLoader:
+    """Pool acotado de hilos que carga miniaturas por prioridad (menor = antes).
+
+    Cada petición va asociada a una clave (p.ej. la fila que la muestra); pedir otra
+    imagen con la misma clave cancela la anterior. Los callbacks se ejecutan en el
+    hilo de Tk. Con un ThumbnailStore, las miniaturas se leen ya redimensionadas y
+    solo se decodifica la imagen original la primera vez.
+    """
+
+    def __init__(self, widget, store=None, workers=2, cache_size=400):
+        self.widget = widget
+        self.store = store
+        self.workers = workers
+        self.cache_size = cache_size
+        self._cond = threading.Condition()
+        self._heap = []
+        self._counter = itertools.count()
+        self._jobs = {}
+        self._cache = OrderedDict()
+        self._started = False
+
+    def _start(self):
+        self._started = True
+        for _ in range(self.workers):
+            threading.Thread(target=self._worker, daemon=True).start()
+
+    def _cache_get(self, path, variant):
+        with self._cond:
+            img = self._cache.get((path, variant))
+            if img is not None:
+                self._cache.move_to_end((path, variant))
+            return img
+
+    def _cache_put(self, path, variant, img):
+        with self._cond:
+            self._cache[(path, variant)] = img
+            self._cache.move_to_end((path, variant))
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def request(self, key, path, variant='list', callback=None, priority=0, group=None, store_key=None):
+        """Encola la carga de la miniatura de 'path'; callback(img o None) se llama en el hilo de Tk"""
+        self.cancel(key)
+        cached = self._cache_get(path, variant)
+        if cached is not None:
+            # False marca archivos sin miniatura ya comprobados
+            if callback:
+                callback(cached or None)
+            return
+
+        job = _Job(key, path, variant, store_key, callback, group)
+        with self._cond:
+            self._jobs[key] = job
+            heapq.heappush(self._heap, (priority, next(self._counter), job))
+            self._cond.notify()
+        if not self._started:
+            self._start()
+
+    def cancel(self, key):
+        with self._cond:
+            job = self._jobs.pop(key, None)
+            if job:
+                job.cancelled = True
+
+    def cancel_group(self, group):
+        with self._cond:
+            for key in [k for k, job in self._jobs.items() if job.group == group]:
+                self._jobs.pop(key).cancelled = True
+
+    def cancel_all(self):
+        with self._cond:
+            for job in self._jobs.values():
+                job.cancelled = True
+            self._jobs.clear()
+            self._heap.clear()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                _, _, job = heapq.heappop(self._heap)
+            if job.cancelled:
+                continue
+
+            try:
+                img = self._load(job)
+            except (OSError, ValueError, Image.DecompressionBombError):
+                img = None
+            self._cache_put(job.path, job.variant, img if img is not None else False)
+
+            if job.callback and not job.cancelled:
+                self.widget.after(0, lambda j=job, i=img: self._deliver(j, i))
+            else:
+                self._forget(job)
+
+    def _load(self, job):
+        if self.store and job.store_key:
+            img = self.store.get(job.store_key, job.variant)
+            if img is not None:
+                return img
+
+        thumb_path = find_sidecar_thumbnail(job.path)
+        if not thumb_path or job.cancelled:
+            return None
+        if self.store and job.store_key:
+            # Decodificar una vez al tamaño mayor y guardar todas las variantes
+            return self.store.put(job.store_key, decode_thumbnail(thumb_path, VARIANTS['card']))[job.variant]
+        return decode_thumbnail(thumb_path, VARIANTS[job.variant])
+
+    def _forget(self, job):
+        with self._cond:
+            if self._jobs.get(job.key) is job:
+                del self._jobs[job.key]
+
+    def _deliver(self, job, img):
+        if job.cancelled:
+            return
+        self._forget(job)
+        job.callback(img)
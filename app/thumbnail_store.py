@@ -0,0 +1,127 @@
+import hashlib
+import os
+import re
+import threading
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from .paths import get_data_dir
+
+# Variantes precalculadas: listas (cola/biblioteca) y tarjeta de resultados
+VARIANTS = {'list': (80, 45), 'card': (320, 180)}
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ThumbnailStore:
+    """Almacén en disco de miniaturas ya redimensionadas, indexado por id de video o hash.
+
+    Cada variante es un JPEG pequeño que se carga con una sola lectura. Cuando el
+    tamaño total supera max_bytes se eliminan las menos usadas recientemente.
+    """
+
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or get_data_dir("thumbnails")
+        os.makedirs(self.root, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None # {nombre: [bytes, último uso]}, se carga al primer put()
+        self._total = 0
+
+    @staticmethod
+    def key_for_video(video_id):
+        return "v_" + re.sub(r'[^A-Za-z0-9_-]', '_', str(video_id))
+
+    @staticmethod
+    def key_for_file(path, size, mtime):
+        digest = hashlib.sha1(f"{os.path.abspath(path)}|{size}|{mtime}".encode('utf-8')).hexdigest()
+        return "f_" + digest[:24]
+
+    def _path(self, key, variant):
+        return os.path.join(self.root, f"{key}_{variant}.jpg")
+
+    def get(self, key, variant):
+        path = self._path(key, variant)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            img = Image.open(BytesIO(data))
+            img.load()
+        except (OSError, ValueError):
+            return None
+        try:
+            os.utime(path) # Marca de uso para la expulsión LRU
+        except OSError:
+            pass
+        return img
+
+    def put(self, key, image):
+        """Genera y guarda todas las variantes a partir de 'image'. Devuelve {variante: imagen}"""
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+
+        result = {}
+        for variant, size in VARIANTS.items():
+            resized = ImageOps.fit(image, size, Image.Resampling.LANCZOS)
+            buf = BytesIO()
+            resized.save(buf, format='JPEG', quality=85)
+            self._write(self._path(key, variant), buf.getvalue())
+            result[variant] = resized
+        self._evict()
+        return result
+
+    def _write(self, path, data):
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error guardando miniatura: {e}")
+            return
+        with self._lock:
+            self._load_entries()
+            name = os.path.basename(path)
+            previous = self._entries.get(name)
+            if previous:
+                self._total -= previous[0]
+            self._entries[name] = [len(data), os.path.getmtime(path)]
+            self._total += len(data)
+
+    def _load_entries(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        self._total = 0
+        try:
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if entry.name.endswith('.jpg') and entry.is_file():
+                        st = entry.stat()
+                        self._entries[entry.name] = [st.st_size, st.st_mtime]
+                        self._total += st.st_size
+        except OSError:
+            pass
+
+    def _evict(self):
+        with self._lock:
+            if self._total <= self.max_bytes:
+                return
+            # Refrescar los tiempos de uso (get() los actualiza en disco)
+            for name, entry in self._entries.items():
+                try:
+                    entry[1] = os.path.getmtime(os.path.join(self.root, name))
+                except OSError:
+                    entry[1] = 0
+            for name, (size, _) in sorted(self._entries.items(), key=lambda e: e[1][1]):
+                if self._total <= self.max_bytes * 0.9:
+                    break
+                try:
+                    os.remove(os.path.join(self.root, name))
+                except OSError:
+                    pass
+                self._total -= size
+                del self._entries[name]
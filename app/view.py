@@ -3,8 +3,25 @@ from tkinter import filedialog, messagebox
 import os
 from PIL import Image
 from .player_frame import MediaPlayerFrame
+from .virtual_list import VirtualList
+from .thumbnail_loader import ThumbnailLoader
+from .thumbnail_store import ThumbnailStore, VARIANTS
+from . import diagnostics
 import threading
-from functools import lru_cache
+
+LIBRARY_THUMB_SIZE = VARIANTS['list']
+MINI_VIDEO_TAG = "MiniVideoSurface" # Bindtag de la superficie de video cuando está en el mini player
+
+# Opciones de límite de ancho de banda (etiqueta, KB/s; 0 = sin límite)
+RATE_PRESETS = [("Sin límite", 0), ("512 KB/s", 512), ("1 MB/s", 1024), ("2 MB/s", 2048),
+                ("5 MB/s", 5120), ("10 MB/s", 10240)]
+
+
+def clear_label_image(label, text=""):
+    """Quita la imagen de un CTkLabel: configure(image=None) deja la anterior en el label interno de Tk"""
+    label.configure(image=None, text=text)
+    label._label.configure(image="")
+
 
 class DownloaderView(ctk.CTk):
     def __init__(self, controller):
@@ -33,15 +50,6 @@ class DownloaderView(ctk.CTk):
         self.active_view = None
         self.animation_running = False
 
-    @lru_cache(maxsize=100)
-    def load_cached_image(self, path, width, height):
-        try:
-            pil_img = Image.open(path)
-            pil_img = pil_img.resize((width, height), Image.Resampling.LANCZOS)
-            return ctk.CTkImage(light_image=pil_img, dark_image=pil_img, size=(width, height))
-        except:
-            return None
-
     def show_toast(self, message, duration=3000):
         """Muestra una notificación flotante en la esquina inferior derecha"""
         toast = ctk.CTkFrame(self, fg_color=("gray20", "gray10"), corner_radius=10, border_width=1, border_color=("gray40", "gray30"))
@@ -68,6 +76,7 @@ class DownloaderView(ctk.CTk):
         self.btn_home = self._create_nav_btn("🏠", "Descargar", lambda: self.controller.show_view("home"))
         self.btn_queue = self._create_nav_btn("📋", "Cola", lambda: self.controller.show_view("queue"))
         self.btn_lib = self._create_nav_btn("📂", "Biblioteca", lambda: self.controller.show_view("library"))
+        self.btn_stats = self._create_nav_btn("📊", "Estadísticas", lambda: self.controller.show_view("stats"))
         
         ctk.CTkFrame(self.sidebar, fg_color="transparent").pack(fill="y", expand=True)
         
@@ -90,6 +99,7 @@ class DownloaderView(ctk.CTk):
         self.init_home_view()
         self.init_queue_view()
         self.init_library_view()
+        self.init_stats_view()
         self.init_mini_player() # Inicializar Mini Player antes del Player View
         self.init_player_view()
 
@@ -141,6 +151,11 @@ class DownloaderView(ctk.CTk):
         self.mini_video_container.bind("<Button-1>", self._start_drag)
         self.mini_video_container.bind("<B1-Motion>", self._do_drag)
         self.mini_video_container.bind("<ButtonRelease-1>", self._on_mini_click)
+        # La superficie de video del reproductor se aloja encima del contenedor: mismos eventos
+        self.bind_class(MINI_VIDEO_TAG, "<Button-1>", self._start_drag)
+        self.bind_class(MINI_VIDEO_TAG, "<B1-Motion>", self._do_drag)
+        self.bind_class(MINI_VIDEO_TAG, "<ButtonRelease-1>", self._on_mini_click)
+        self.bind_class(MINI_VIDEO_TAG, "<Enter>", self._show_mini_overlay)
         
         # 2. Hover para mostrar controles
         self.mini_player_frame.bind("<Enter>", self._show_mini_overlay)
@@ -359,10 +374,52 @@ class DownloaderView(ctk.CTk):
                                            command=self.controller.start_queue)
         self.btn_start_queue.pack(side="right")
 
+        # --- Límites de ancho de banda (se aplican en caliente) ---
+        limits_frame = ctk.CTkFrame(self.queue_frame, fg_color=("gray90", "gray15"), corner_radius=10, height=40)
+        limits_frame.pack(fill="x", padx=40, pady=(0, 20))
+
+        labels = [label for label, _ in RATE_PRESETS]
+        ctk.CTkLabel(limits_frame, text="Límite total:", font=("Segoe UI", 12, "bold"), text_color=("gray40", "gray60")).pack(side="left", padx=(15, 5), pady=5)
+        self.rate_total_menu = ctk.CTkOptionMenu(limits_frame, values=labels, width=110, height=25, text_color=("black", "white"),
+                                                 command=lambda _: self.controller.on_rate_limit_change())
+        self.rate_total_menu.pack(side="left", pady=5)
+
+        ctk.CTkLabel(limits_frame, text="Por descarga:", font=("Segoe UI", 12, "bold"), text_color=("gray40", "gray60")).pack(side="left", padx=(20, 5), pady=5)
+        self.rate_job_menu = ctk.CTkOptionMenu(limits_frame, values=labels, width=110, height=25, text_color=("black", "white"),
+                                               command=lambda _: self.controller.on_rate_limit_change())
+        self.rate_job_menu.pack(side="left", pady=5)
+
+        ctk.CTkLabel(limits_frame, text="Simultáneas:", font=("Segoe UI", 12, "bold"), text_color=("gray40", "gray60")).pack(side="left", padx=(20, 5), pady=5)
+        self.concurrency_menu = ctk.CTkOptionMenu(limits_frame, values=[str(n) for n in range(1, 9)], width=70, height=25, text_color=("black", "white"),
+                                                  command=lambda value: self.controller.on_concurrency_change(int(value)))
+        self.concurrency_menu.pack(side="left", pady=5)
+
         # Scrollable List
         self.queue_scroll = ctk.CTkScrollableFrame(self.queue_frame, fg_color="transparent")
         self.queue_scroll.pack(fill="both", expand=True, padx=40, pady=(0, 40))
 
+    def set_rate_limits(self, total_kbps, job_kbps):
+        for menu, kbps in ((self.rate_total_menu, total_kbps), (self.rate_job_menu, job_kbps)):
+            label = next((l for l, v in RATE_PRESETS if v == kbps), None)
+            if label is None:
+                # Valor personalizado escrito a mano en config.json
+                label = f"{kbps} KB/s"
+                menu.configure(values=[l for l, _ in RATE_PRESETS] + [label])
+            menu.set(label)
+
+    def set_max_concurrent(self, value):
+        if str(value) not in self.concurrency_menu.cget("values"):
+            self.concurrency_menu.configure(values=[str(n) for n in range(1, 9)] + [str(value)])
+        self.concurrency_menu.set(str(value))
+
+    def get_rate_limits(self):
+        def to_kbps(label):
+            preset = next((v for l, v in RATE_PRESETS if l == label), None)
+            if preset is not None: return preset
+            try: return int(label.split()[0])
+            except (ValueError, IndexError): return 0
+        return to_kbps(self.rate_total_menu.get()), to_kbps(self.rate_job_menu.get())
+
     def add_queue_item_widget(self, item_data, index):
         row = ctk.CTkFrame(self.queue_scroll, fg_color=("white", "gray15"), corner_radius=10)
         row.pack(fill="x", pady=5)
@@ -371,15 +428,8 @@ class DownloaderView(ctk.CTk):
         thumb_lbl = ctk.CTkLabel(row, text="", width=80, height=45)
         thumb_lbl.pack(side="left", padx=10, pady=5)
         
-        if item_data.get('thumbnail_url'):
-            # We might need to load this image. For now, just placeholder or if we have the image object.
-            # The controller should probably pass the image object if available, or we load it here.
-            # Since we don't want to block, we'll just show an icon for now or load it async if we had the mechanism.
-            # But wait, the model has `load_thumbnail_image`.
-            # For simplicity, let's just show an icon or text.
-            thumb_lbl.configure(text="🎬" if item_data['mode'] == "Video" else "🎵", font=("Arial", 20))
-        else:
-            thumb_lbl.configure(text="🎬" if item_data['mode'] == "Video" else "🎵", font=("Arial", 20))
+        # Icono hasta que el controlador entregue la miniatura (set_queue_item_thumbnail)
+        thumb_lbl.configure(text="🎬" if item_data['mode'] == "Video" else "🎵", font=("Arial", 20))
 
         # Info
         info_box = ctk.CTkFrame(row, fg_color="transparent")
@@ -404,6 +454,7 @@ class DownloaderView(ctk.CTk):
         progress_bar.set(0)
         
         # Store references to update later
+        row.thumb_lbl = thumb_lbl
         row.status_lbl = status_lbl
         row.progress_bar = progress_bar
         
@@ -412,6 +463,16 @@ class DownloaderView(ctk.CTk):
             self.queue_widgets = []
         self.queue_widgets.append(row)
 
+    def set_download_progress(self, progress):
+        self.progress_bar.set(progress)
+        self.progress_percent_lbl.configure(text=f"{int(progress*100)}%")
+        self.progress_status_lbl.configure(text="Descargando...")
+
+    def set_queue_item_thumbnail(self, index, pil_image):
+        if not hasattr(self, 'queue_widgets') or index >= len(self.queue_widgets): return
+        ctk_image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=LIBRARY_THUMB_SIZE)
+        self.queue_widgets[index].thumb_lbl.configure(image=ctk_image, text="")
+
     def update_queue_item_status(self, index, status, progress=0):
         if not hasattr(self, 'queue_widgets') or index >= len(self.queue_widgets): return
         
@@ -459,8 +520,77 @@ class DownloaderView(ctk.CTk):
                     command=self.controller.browse_folder).pack(side="right", padx=15, pady=5)
         # ------------------------------------------------
 
-        self.lib_scroll = ctk.CTkScrollableFrame(self.library_frame, fg_color="transparent")
-        self.lib_scroll.pack(fill="both", expand=True, padx=40, pady=(0, 40))
+        # Lista virtualizada: solo existen las filas visibles en pantalla
+        self.thumb_loader = ThumbnailLoader(self, store=self.controller.model.thumbnail_store, workers=2)
+        self.lib_list = VirtualList(self.library_frame, row_height=65,
+                                    create_row=self._create_library_row,
+                                    bind_row=self._bind_library_row,
+                                    unbind_row=self._unbind_library_row,
+                                    on_layout=self._prefetch_library_thumbs)
+        self.lib_list.pack(fill="both", expand=True, padx=40, pady=(0, 40))
+
+    def init_stats_view(self):
+        self.stats_frame = ctk.CTkFrame(self.content_area, fg_color="transparent")
+
+        header = ctk.CTkFrame(self.stats_frame, fg_color="transparent")
+        header.pack(fill="x", padx=40, pady=30)
+        ctk.CTkLabel(header, text="Estadísticas", font=("Segoe UI", 24, "bold"), text_color=("black", "white")).pack(side="left")
+        ctk.CTkButton(header, text="↻", width=40, command=lambda: self.controller.show_view("stats")).pack(side="right")
+
+        # Resumen de la sesión
+        cards = ctk.CTkFrame(self.stats_frame, fg_color="transparent")
+        cards.pack(fill="x", padx=40, pady=(0, 15))
+        self.stats_cards = {}
+        for key, title in (("jobs", "Trabajos"), ("errors", "Errores"), ("bytes", "Descargado"),
+                           ("avg_bps", "Velocidad media"), ("retries", "Reintentos")):
+            card = ctk.CTkFrame(cards, fg_color=("gray90", "gray15"), corner_radius=10)
+            card.pack(side="left", fill="x", expand=True, padx=(0, 10))
+            ctk.CTkLabel(card, text=title, font=("Segoe UI", 11), text_color=("gray40", "gray60")).pack(pady=(10, 0))
+            value = ctk.CTkLabel(card, text="-", font=("Segoe UI", 18, "bold"), text_color=("black", "white"))
+            value.pack(pady=(0, 10))
+            self.stats_cards[key] = value
+
+        self.stats_stages_lbl = ctk.CTkLabel(self.stats_frame, text="", font=("Segoe UI", 12), anchor="w",
+                                             text_color=("gray30", "gray70"))
+        self.stats_stages_lbl.pack(fill="x", padx=40, pady=(0, 10))
+
+        self.stats_list = ctk.CTkScrollableFrame(self.stats_frame, fg_color="transparent")
+        self.stats_list.pack(fill="both", expand=True, padx=40, pady=(0, 40))
+
+    def render_stats(self, summary, jobs):
+        def rate(bps):
+            return f"{bps / 1024 ** 2:.1f} MB/s" if bps else "-"
+
+        self.stats_cards["jobs"].configure(text=str(summary['jobs']))
+        self.stats_cards["errors"].configure(text=str(summary['errors']))
+        self.stats_cards["bytes"].configure(text=f"{summary['bytes'] / 1024 ** 2:.1f} MB")
+        self.stats_cards["avg_bps"].configure(text=rate(summary['avg_bps']))
+        self.stats_cards["retries"].configure(text=str(summary['retries']))
+
+        stages = "    ".join(f"{stage}: {ms:.0f} ms" for stage, ms in summary['stage_avg_ms'].items())
+        self.stats_stages_lbl.configure(text=f"Media por etapa:    {stages}" if stages else "Aún no hay trabajos en esta sesión")
+
+        for widget in self.stats_list.winfo_children():
+            widget.destroy()
+        for job in jobs:
+            row = ctk.CTkFrame(self.stats_list, fg_color=("white", "gray20"), corner_radius=8)
+            row.pack(fill="x", pady=3)
+            ok = job['status'] == 'completed'
+            ctk.CTkLabel(row, text="✔" if ok else "✖", width=24,
+                         text_color="#2CC985" if ok else "#FF5555").pack(side="left", padx=(10, 0))
+            name = job.get('filename') or job['url']
+            kind = "Análisis" if job['kind'] == 'info' else "Descarga"
+            ctk.CTkLabel(row, text=f"{kind}: {name[:45]}", font=("Segoe UI", 12, "bold"), anchor="w",
+                         text_color=("black", "white")).pack(side="left", padx=10, pady=6)
+
+            details = [f"{job['total_ms'] / 1000:.1f} s"]
+            if job['bytes']:
+                details.append(f"{job['bytes'] / 1024 ** 2:.1f} MB")
+                details.append(f"{rate(job['avg_bps'])} (máx. {rate(job['peak_bps'])})")
+            if job['retries']:
+                details.append(f"{job['retries']} reintentos")
+            ctk.CTkLabel(row, text="  ·  ".join(details), font=("Segoe UI", 11),
+                         text_color=("gray40", "gray60")).pack(side="right", padx=10)
 
     def update_path_labels(self, path):
         name = os.path.basename(path)
@@ -481,6 +611,7 @@ class DownloaderView(ctk.CTk):
             "home": self.home_frame,
             "queue": self.queue_frame,
             "library": self.library_frame,
+            "stats": self.stats_frame,
             "player": self.player_frame
         }
         
@@ -505,6 +636,7 @@ class DownloaderView(ctk.CTk):
         self.btn_home.configure(text_color=("gray40", "gray60"), fg_color="transparent")
         self.btn_queue.configure(text_color=("gray40", "gray60"), fg_color="transparent")
         self.btn_lib.configure(text_color=("gray40", "gray60"), fg_color="transparent")
+        self.btn_stats.configure(text_color=("gray40", "gray60"), fg_color="transparent")
         
         if view_name == "home":
             self.btn_home.configure(text_color=("blue", "#44AAFF"), fg_color=("gray85", "gray15"))
@@ -512,7 +644,10 @@ class DownloaderView(ctk.CTk):
             self.btn_queue.configure(text_color=("blue", "#44AAFF"), fg_color=("gray85", "gray15"))
         elif view_name == "library":
             self.btn_lib.configure(text_color=("blue", "#44AAFF"), fg_color=("gray85", "gray15"))
+        elif view_name == "stats":
+            self.btn_stats.configure(text_color=("blue", "#44AAFF"), fg_color=("gray85", "gray15"))
 
+    @diagnostics.profiled("update_formats_ui")
     def update_formats_ui(self, labels, title, thumbnail_img=None):
         self.video_title_lbl.configure(text=title[:50] + "..." if len(title)>50 else title)
         
@@ -527,49 +662,75 @@ class DownloaderView(ctk.CTk):
             base_width = 320
             w_percent = (base_width / float(thumbnail_img.size[0]))
             h_size = int((float(thumbnail_img.size[1]) * float(w_percent)))
-            pil_image = thumbnail_img.resize((base_width, h_size), Image.Resampling.LANCZOS)
+            pil_image = thumbnail_img
+            # La variante 'card' del almacén ya viene a 320x180
+            if thumbnail_img.size != (base_width, h_size):
+                pil_image = thumbnail_img.resize((base_width, h_size), Image.Resampling.LANCZOS)
             ctk_image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(base_width, h_size))
             self.thumbnail_lbl.configure(image=ctk_image, text="")
         else:
-            self.thumbnail_lbl.configure(image=None, text="[Sin Imagen]")
+            clear_label_image(self.thumbnail_lbl, "[Sin Imagen]")
 
         self.results_card.pack(pady=20, fill="x")
 
+    @diagnostics.profiled("render_library")
     def render_library(self, files):
-        for w in self.lib_scroll.winfo_children(): w.destroy()
-        
-        def load_item_image(label, path):
-            base_path = os.path.splitext(path)[0]
-            thumb_path = None
-            for ext in ['.jpg', '.webp', '.png']:
-                if os.path.exists(base_path + ext):
-                    thumb_path = base_path + ext
-                    break
-            
-            if thumb_path:
-                img = self.load_cached_image(thumb_path, 80, 45)
-                if img:
-                    self.after(0, lambda: label.configure(image=img, text=""))
-
-        for item in files:
-            row = ctk.CTkFrame(self.lib_scroll, fg_color=("white", "gray15"), corner_radius=10)
-            row.pack(fill="x", pady=5)
-            
-            # Placeholder inicial
-            thumb_lbl = ctk.CTkLabel(row, text="⏳", width=80, height=45, fg_color=("gray90", "gray20"), corner_radius=5)
-            thumb_lbl.pack(side="left", padx=10, pady=5)
-            
-            # Cargar imagen en hilo separado
-            threading.Thread(target=load_item_image, args=(thumb_lbl, item['path']), daemon=True).start()
-            
-            info_box = ctk.CTkFrame(row, fg_color="transparent")
-            info_box.pack(side="left", fill="x", expand=True)
-            
-            ctk.CTkLabel(info_box, text=item['name'], font=("Segoe UI", 14, "bold"), anchor="w", text_color=("black", "white")).pack(fill="x")
-            ctk.CTkLabel(info_box, text=item['type'], font=("Segoe UI", 11), text_color="gray", anchor="w").pack(fill="x")
-            
-            ctk.CTkButton(row, text="▶ Reproducir", width=100, fg_color=("blue", "#44AAFF"), text_color="white",
-                         command=lambda p=item['path'], n=item['name']: self.controller.open_player(p, n)).pack(side="right", padx=15)
+        # Las cargas pendientes del render anterior ya no sirven
+        self.thumb_loader.cancel_all()
+        self.lib_list.set_items(files)
+
+    def _create_library_row(self, parent):
+        row = ctk.CTkFrame(parent, fg_color=("white", "gray15"), corner_radius=10)
+
+        row.thumb_lbl = ctk.CTkLabel(row, text="⏳", width=80, height=45, fg_color=("gray90", "gray20"), corner_radius=5)
+        row.thumb_lbl.pack(side="left", padx=10, pady=5)
+
+        info_box = ctk.CTkFrame(row, fg_color="transparent")
+        info_box.pack(side="left", fill="x", expand=True)
+
+        row.name_lbl = ctk.CTkLabel(info_box, text="", font=("Segoe UI", 14, "bold"), anchor="w", text_color=("black", "white"))
+        row.name_lbl.pack(fill="x")
+        row.type_lbl = ctk.CTkLabel(info_box, text="", font=("Segoe UI", 11), text_color="gray", anchor="w")
+        row.type_lbl.pack(fill="x")
+
+        row.play_btn = ctk.CTkButton(row, text="▶ Reproducir", width=100, fg_color=("blue", "#44AAFF"), text_color="white")
+        row.play_btn.pack(side="right", padx=15)
+        return row
+
+    def _bind_library_row(self, row, item, index):
+        row.name_lbl.configure(text=item['name'])
+        row.type_lbl.configure(text=item['type'])
+        row.play_btn.configure(command=lambda p=item['path'], n=item['name']: self.controller.open_player(p, n))
+
+        # Placeholder hasta que cargue la miniatura de esta fila
+        clear_label_image(row.thumb_lbl, "⏳")
+        icon = "🎬" if item['type'] == "Video" else "🎵"
+
+        def _apply(img):
+            if img:
+                ctk_img = ctk.CTkImage(light_image=img, dark_image=img, size=LIBRARY_THUMB_SIZE)
+                row.thumb_lbl.configure(image=ctk_img, text="")
+            else:
+                row.thumb_lbl.configure(text=icon)
+
+        # Las filas visibles van primero; pedir de nuevo para la misma fila cancela la carga anterior
+        self.thumb_loader.request(id(row), item['path'], 'list', _apply, priority=0,
+                                  store_key=self._library_store_key(item))
+
+    def _unbind_library_row(self, row):
+        self.thumb_loader.cancel(id(row))
+
+    def _prefetch_library_thumbs(self, first, last):
+        # Precargar (sin pintar) la página siguiente con menor prioridad
+        self.thumb_loader.cancel_group("prefetch")
+        items = self.lib_list.items
+        for item in items[last:last + (last - first)]:
+            self.thumb_loader.request(("prefetch", item['path']), item['path'], 'list',
+                                      priority=1, group="prefetch", store_key=self._library_store_key(item))
+
+    def _library_store_key(self, item):
+        if item.get('size') is None: return None
+        return ThumbnailStore.key_for_file(item['path'], item['size'], item.get('mtime'))
 
     def setup_sidebar(self):
         # --- EXISTENTE: Marco de la barra lateral ---
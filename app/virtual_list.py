@@ -0,0 +1,126 @@
+import math
+import sys
+import customtkinter as ctk
+
+
+class VirtualList(ctk.CTkFrame):
+    """Lista con scroll que solo crea las filas visibles y las recicla al desplazarse.
+
+    create_row(parent) construye un widget de fila vacío y bind_row(row, item, index)
+    lo rellena con los datos de un item. unbind_row(row) se llama cuando una fila deja
+    de mostrarse y on_layout(first, last) tras cada recolocación. El coste de
+    renderizar depende de la altura de la ventana, no del número de items.
+    """
+
+    def __init__(self, parent, row_height, create_row, bind_row, unbind_row=None, on_layout=None, **kwargs):
+        kwargs.setdefault("fg_color", "transparent")
+        super().__init__(parent, **kwargs)
+        self.row_height = row_height
+        self.create_row = create_row
+        self.bind_row = bind_row
+        self.unbind_row = unbind_row
+        self.on_layout = on_layout
+        self.items = []
+        self.offset = 0
+        self.rows = []
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.viewport = ctk.CTkFrame(self, fg_color="transparent", corner_radius=0)
+        self.viewport.pack(side="left", fill="both", expand=True)
+        self.viewport.bind("<Configure>", lambda e: self._layout())
+
+        # Igual que CTkScrollableFrame: binding global y filtrado por widget
+        if sys.platform.startswith("linux"):
+            self.bind_all("<Button-4>", self._on_mousewheel, add="+")
+            self.bind_all("<Button-5>", self._on_mousewheel, add="+")
+        else:
+            self.bind_all("<MouseWheel>", self._on_mousewheel, add="+")
+
+    def set_items(self, items, keep_offset=False):
+        self.items = items
+        if not keep_offset:
+            self.offset = 0
+        for row in self.rows:
+            row.bound_index = None
+        self._layout()
+
+    def visible_range(self):
+        """Rango [inicio, fin) de índices visibles actualmente"""
+        height = max(1, self.viewport.winfo_height())
+        first = self.offset // self.row_height
+        last = min(len(self.items), math.ceil((self.offset + height) / self.row_height))
+        return first, last
+
+    def _max_offset(self):
+        total = len(self.items) * self.row_height
+        return max(0, total - self.viewport.winfo_height())
+
+    def scroll_to(self, offset):
+        offset = int(max(0, min(offset, self._max_offset())))
+        if offset != self.offset:
+            self.offset = offset
+            self._layout()
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.items) * self.row_height)
+        elif args[0] == "scroll":
+            self.scroll_to(self.offset + int(args[1]) * self.row_height)
+
+    def _on_mousewheel(self, event):
+        if not self.winfo_ismapped() or not str(event.widget).startswith(str(self)):
+            return
+        if getattr(event, "num", None) == 4:
+            steps = -1
+        elif getattr(event, "num", None) == 5:
+            steps = 1
+        elif sys.platform == "darwin":
+            steps = -event.delta
+        else:
+            steps = -int(event.delta / 120) or (-1 if event.delta > 0 else 1)
+        self.scroll_to(self.offset + steps * self.row_height)
+
+    def _layout(self):
+        height = max(1, self.viewport.winfo_height())
+        needed = math.ceil(height / self.row_height) + 1
+
+        # Crear filas solo hasta cubrir el alto visible
+        while len(self.rows) < needed:
+            row = self.create_row(self.viewport)
+            row.bound_index = None
+            self.rows.append(row)
+
+        self.offset = int(max(0, min(self.offset, self._max_offset())))
+        first = self.offset // self.row_height
+        last = min(len(self.items), first + needed)
+
+        # Cada índice usa siempre la misma fila del pool (índice % needed), así al
+        # desplazar una fila solo se vuelve a rellenar la que entra en pantalla
+        shown = set()
+        for index in range(first, last):
+            row = self.rows[index % needed]
+            shown.add(id(row))
+            if row.bound_index != index:
+                row.bound_index = index
+                self.bind_row(row, self.items[index], index)
+            row.place(x=0, y=index * self.row_height - self.offset + 5,
+                      relwidth=1, height=self.row_height - 10)
+
+        for row in self.rows:
+            if id(row) not in shown:
+                if row.winfo_manager():
+                    row.place_forget()
+                if row.bound_index is not None and self.unbind_row:
+                    self.unbind_row(row)
+                row.bound_index = None
+
+        total = len(self.items) * self.row_height
+        if total <= height:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.offset / total, (self.offset + height) / total)
+
+        if self.on_layout:
+            self.on_layout(first, last)
@@ -0,0 +1,256 @@
+"""Benchmark de extremo a extremo: descargas reales contra un servidor local.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.e2e [--quick] [--sizes 8,64] [--concurrency 1,2,4] [--items 8]
+                             [--rate BYTES_S] [--save-baseline] [--check] [--json salida.json]
+
+Mide DownloaderModel.download_video y process_queue con el extractor de prueba de
+benchmarks/standin.py. Para cada escenario informa MB/s, latencia media por etapa
+(extract, download, postprocess, cleanup) y tiempo de CPU del proceso (el servidor
+corre en otro proceso). Los resultados se comparan con benchmarks/baselines.json.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+MB = 1024 * 1024
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+
+def _make_real_media(folder):
+    """Genera video.mp4 y audio.m4a con ffmpeg para medir la fusión. Devuelve False sin ffmpeg"""
+    if not shutil.which('ffmpeg'):
+        return False
+    commands = [
+        ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', 'testsrc=size=1280x720:rate=30',
+         '-t', '30', '-c:v', 'libx264', '-preset', 'ultrafast', '-an', os.path.join(folder, 'video.mp4')],
+        ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', 'sine=frequency=440',
+         '-t', '30', '-c:a', 'aac', os.path.join(folder, 'audio.m4a')],
+    ]
+    try:
+        for cmd in commands:
+            subprocess.run(cmd, check=True)
+        return True
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"Aviso: no se pudo generar media real con ffmpeg: {e}")
+        return False
+
+
+def _start_server(media_dir, rate):
+    from .server import serve_in_process
+    ctx = multiprocessing.get_context('spawn')
+    ready, stop = ctx.Queue(), ctx.Event()
+    proc = ctx.Process(target=serve_in_process, args=(ready, stop, media_dir, rate), daemon=True)
+    proc.start()
+    return proc, stop, ready.get(timeout=30)
+
+
+def _folder_bytes(folder):
+    return sum(entry.stat().st_size for entry in os.scandir(folder) if entry.is_file())
+
+
+class Runner:
+    def __init__(self, work_dir, recorder):
+        self.work_dir = work_dir
+        self.recorder = recorder
+        self.counter = 0
+
+    def _new_model(self, name):
+        from app.model import DownloaderModel
+        folder = os.path.join(self.work_dir, name)
+        os.makedirs(folder, exist_ok=True)
+        model = DownloaderModel(persist_queue=False)
+        model.download_path = folder
+        model.bandwidth.set_limits(None, None) # Ignorar los límites de config.json
+        return model, folder
+
+    def _next_id(self):
+        self.counter += 1
+        return f"v{self.counter:04d}"
+
+    def _extract(self, model, url, video_id):
+        self.recorder.begin(video_id, 'extract')
+        model.extract_info(url, use_cache=False)
+        self.recorder.end(video_id, 'extract')
+
+    def _measure(self, name, folder, body):
+        self.recorder.reset()
+        errors = []
+        cpu0, wall0 = time.process_time(), time.perf_counter()
+        body(errors)
+        wall = time.perf_counter() - wall0
+        cpu = time.process_time() - cpu0
+        total = _folder_bytes(folder)
+        stages = self.recorder.stage_times()
+        return {
+            'name': name,
+            'bytes': total,
+            'seconds': round(wall, 3),
+            'mb_s': round(total / MB / wall, 2) if wall > 0 else 0,
+            'cpu_seconds': round(cpu, 3),
+            'stages_ms': {k: round(v * 1000, 1) for k, v in stages.items()},
+            'errors': errors,
+        }
+
+    def single(self, kind, size, fmt):
+        from .standin import bench_url
+        name = f"single-{kind}-{size // MB}MB"
+        model, folder = self._new_model(name)
+
+        def body(errors):
+            video_id = self._next_id()
+            url = bench_url(kind, size, video_id)
+            self._extract(model, url, video_id)
+            done = threading.Event()
+
+            def complete():
+                self.recorder.end(video_id, 'done')
+                done.set()
+
+            def error(msg):
+                errors.append(msg)
+                done.set()
+
+            model.download_video(url, {'format_id': fmt}, "Video", video_id, None, complete, error)
+            done.wait()
+
+        return self._measure(name, folder, body)
+
+    def queue(self, kind, size, items, concurrency, fmt):
+        from .standin import bench_url
+        name = f"queue-{kind}-{size // MB}MBx{items}-c{concurrency}"
+        model, folder = self._new_model(name)
+        # Atributo directo: set_max_concurrent_downloads escribiría config.json
+        model.max_concurrent_downloads = concurrency
+
+        def body(errors):
+            ids = []
+            for _ in range(items):
+                video_id = self._next_id()
+                url = bench_url(kind, size, video_id)
+                self._extract(model, url, video_id)
+                model.add_to_queue(url, {'format_id': fmt}, "Video", video_id, video_id, None, video_id)
+                ids.append(video_id)
+
+            done = threading.Event()
+            model.process_queue(
+                lambda i, p: None,
+                lambda i: self.recorder.end(ids[i], 'done'),
+                done.set,
+                lambda i, msg: errors.append(msg),
+            )
+            done.wait()
+
+        return self._measure(name, folder, body)
+
+
+def _compare(results, baselines, tolerance):
+    regressions = []
+    base = baselines.get('results', {})
+    for r in results:
+        ref = base.get(r['name'])
+        if not ref or not ref.get('mb_s'):
+            r['vs_baseline'] = None
+            continue
+        ratio = r['mb_s'] / ref['mb_s']
+        r['vs_baseline'] = round(ratio, 3)
+        if ratio < 1 - tolerance:
+            regressions.append(r['name'])
+    return regressions
+
+
+def _print_table(results):
+    print(f"{'escenario':<30}{'MB/s':>9}{'CPU s':>8}{'extract':>9}{'download':>10}{'postproc':>10}{'cleanup':>9}{'vs base':>9}")
+    for r in results:
+        st = r['stages_ms']
+        cols = [st.get(k) for k in ('extract', 'download', 'postprocess', 'cleanup')]
+        cols = [f"{c:.0f}" if c is not None else "-" for c in cols]
+        vs = f"{r['vs_baseline']:.2f}x" if r.get('vs_baseline') else "-"
+        print(f"{r['name']:<30}{r['mb_s']:>9.1f}{r['cpu_seconds']:>8.2f}{cols[0]:>9}{cols[1]:>10}{cols[2]:>10}{cols[3]:>9}{vs:>9}")
+        for msg in r['errors']:
+            print(f"    error: {msg}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de descargas contra un servidor local")
+    parser.add_argument('--quick', action='store_true', help="Tamaños pequeños para una pasada rápida")
+    parser.add_argument('--sizes', default='8,64', help="Tamaños en MB para las descargas individuales")
+    parser.add_argument('--concurrency', default='1,2,4', help="Niveles de concurrencia de la cola")
+    parser.add_argument('--items', type=int, default=8, help="Items por ejecución de la cola")
+    parser.add_argument('--queue-size', type=int, default=16, help="Tamaño en MB de cada item de la cola")
+    parser.add_argument('--rate', type=int, help="Límite del servidor por conexión (bytes/s)")
+    parser.add_argument('--save-baseline', action='store_true', help="Guardar estos resultados como referencia")
+    parser.add_argument('--check', action='store_true', help="Salir con código 1 si hay regresiones")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Caída de MB/s tolerada (0.2 = 20%%)")
+    parser.add_argument('--json', help="Escribir los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.sizes, args.queue_size, args.items = '4', 4, 4
+    sizes = [int(s) * MB for s in args.sizes.split(',') if s]
+    levels = [int(c) for c in args.concurrency.split(',') if c]
+
+    work_dir = tempfile.mkdtemp(prefix="ytd-bench-")
+    # Datos de la app (cachés, índices) aislados del usuario: antes de importar app
+    os.environ['YTD_DATA_DIR'] = os.path.join(work_dir, "data")
+    media_dir = os.path.join(work_dir, "media")
+    os.makedirs(media_dir)
+    has_real = _make_real_media(media_dir)
+
+    proc, stop, base_url = _start_server(media_dir, args.rate)
+    results = []
+    try:
+        from .standin import install
+        with install(base_url) as recorder:
+            runner = Runner(work_dir, recorder)
+            for size in sizes:
+                results.append(runner.single('prog', size, 'prog'))
+                results.append(runner.single('dash', size, 'dash'))
+            if has_real:
+                results.append(runner.single('real', 0, 'v+a'))
+            for level in levels:
+                results.append(runner.queue('prog', args.queue_size * MB, args.items, level, 'prog'))
+            results.append(runner.queue('dash', args.queue_size * MB, args.items, max(levels), 'dash'))
+    finally:
+        stop.set()
+        proc.join(timeout=5)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    baselines = {}
+    if os.path.exists(BASELINES_PATH):
+        with open(BASELINES_PATH, 'r', encoding='utf-8') as f:
+            baselines = json.load(f)
+    regressions = _compare(results, baselines, args.tolerance)
+    _print_table(results)
+
+    machine = {'python': platform.python_version(), 'platform': platform.platform(),
+               'cpus': os.cpu_count(), 'ffmpeg': has_real}
+    if baselines.get('machine') and baselines['machine'] != machine:
+        print("Aviso: la referencia se tomó en otra máquina; compare con cautela.")
+    if regressions:
+        print(f"Regresiones (> {args.tolerance:.0%} más lento): {', '.join(regressions)}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'machine': machine, 'results': results}, f, indent=2)
+    if args.save_baseline:
+        merged = dict(baselines.get('results', {}))
+        merged.update({r['name']: {'mb_s': r['mb_s'], 'cpu_seconds': r['cpu_seconds'],
+                                   'stages_ms': r['stages_ms']} for r in results if not r['errors']})
+        with open(BASELINES_PATH, 'w', encoding='utf-8') as f:
+            json.dump({'machine': machine, 'results': merged}, f, indent=2, sort_keys=True)
+        print(f"Referencia guardada en {BASELINES_PATH}")
+
+    return 1 if args.check and regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Micro-benchmarks de los caminos críticos del modelo con datos sintéticos grandes.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.micro [--files 10000,100000] [--formats 300] [--repeat 5] [--json salida.json]
+
+Mide, con tiempo (mejor y mediana) y pico de memoria (tracemalloc):
+    process_formats      info dict con cientos de formatos, modos Video y Audio
+    get_library_files    carpeta con N archivos: índice frío, sin cambios y solo caché
+    search               construcción del índice de búsqueda de la biblioteca y consultas
+    reserve_name         nombres únicos con cientos de colisiones (y el bucle con listdir anterior)
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+CODECS = ['avc1.640028', 'vp09.00.40.08', 'av01.0.08M.08']
+HEIGHTS = [144, 240, 360, 480, 720, 1080, 1440, 2160]
+WORDS = ['video', 'música', 'Canción', 'tutorial', 'directo', 'Entrevista', 'podcast', 'trailer',
+         'review', 'concierto', 'documental', 'gameplay', 'receta', 'noticias', 'clase']
+COLLISIONS = 500 # "video_download (#N).mp4" ya existentes en la carpeta
+
+
+def synthetic_info(count, seed=0):
+    """Info dict al estilo de YouTube con 'count' formatos de video, audio y HLS"""
+    rng = random.Random(seed)
+    formats = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.2:
+            formats.append({
+                'format_id': f"a{i}", 'ext': 'm4a', 'vcodec': 'none', 'acodec': 'mp4a.40.2',
+                'abr': rng.choice([48, 64, 128, 160]), 'filesize': rng.randint(1, 20) * 1024 ** 2,
+                'url': f"https://example.invalid/a{i}", 'protocol': 'https',
+            })
+            continue
+        height = rng.choice(HEIGHTS)
+        fmt = {
+            'format_id': str(100 + i), 'ext': 'mp4', 'height': height, 'width': height * 16 // 9,
+            'fps': rng.choice([24, 30, 60]), 'vcodec': rng.choice(CODECS),
+            'acodec': 'mp4a.40.2' if kind > 0.9 else 'none',
+            'tbr': height * rng.uniform(2, 6), 'url': f"https://example.invalid/v{i}",
+            'protocol': 'https',
+        }
+        if kind > 0.8:
+            fmt.update(protocol='m3u8_native', manifest_url="https://example.invalid/master.m3u8")
+        elif rng.random() < 0.7:
+            fmt['filesize'] = int(fmt['tbr'] * 125 * 600)
+        formats.append(fmt)
+    return {'id': 'synthetic', 'title': 'Synthetic', 'duration': 600, 'formats': formats,
+            'thumbnail': None}
+
+
+def make_folder(root, count, seed=0):
+    """Carpeta con 'count' archivos vacíos de biblioteca (video y audio) y colisiones de nombre"""
+    rng = random.Random(seed)
+    folder = os.path.join(root, f"lib{count}")
+    os.makedirs(folder)
+    exts = ['.mp4', '.mp4', '.mp4', '.mp3', '.m4a', '.mkv', '.webm', '.jpg']
+    for i in range(count - COLLISIONS):
+        name = f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}{rng.choice(exts)}"
+        os.close(os.open(os.path.join(folder, name), os.O_CREAT | os.O_WRONLY))
+    for i in range(COLLISIONS):
+        name = "video_download.mp4" if i == 0 else f"video_download (#{i}).mp4"
+        os.close(os.open(os.path.join(folder, name), os.O_CREAT | os.O_WRONLY))
+    return folder
+
+
+def measure(fn, repeat, setup=None, per_call=1):
+    """Tiempo mejor/mediano en ms (por llamada) y pico de memoria en KB de una ejecución aparte"""
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        t = time.perf_counter()
+        fn(arg)
+        times.append((time.perf_counter() - t) * 1000 / per_call)
+
+    arg = setup() if setup else None
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'best_ms': round(min(times), 3), 'median_ms': round(statistics.median(times), 3),
+            'peak_kb': round(peak / 1024, 1)}
+
+
+def _legacy_unique_stem(path, filename, ext):
+    # Bucle anterior a reserve_name: listdir completo por cada nombre
+    existing_files = set(os.listdir(path))
+    base_filename = filename
+    counter = 1
+    while f"{base_filename}.{ext}" in existing_files and counter < 1000:
+        base_filename = f"{filename} (#{counter})"
+        counter += 1
+    return base_filename
+
+
+def bench_formats(model, count, repeat):
+    info = synthetic_info(count)
+    results = {}
+    for mode in ('Video', 'Audio'):
+        def run(_, mode=mode):
+            # Un info dict nuevo (misma forma) para no reutilizar la tabla cacheada
+            model.current_video_info = dict(info)
+            model.process_formats(mode)
+        results[f"process_formats[{mode}] {count} formatos"] = measure(run, repeat)
+
+    def cached(_):
+        model.process_formats('Video')
+    model.current_video_info = dict(info)
+    model.process_formats('Video')
+    results[f"process_formats[cache] {count} formatos"] = measure(cached, repeat)
+    return results
+
+
+def bench_library(model, folder, count, repeat, data_dir):
+    from app.library_index import LibraryIndex
+    results = {}
+    index_path = os.path.join(data_dir, f"index_{count}.json")
+
+    def fresh_index():
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        model.library_index = LibraryIndex(index_path)
+
+    def cold(_):
+        model.get_library_files()
+    results[f"get_library_files[frío] {count}"] = measure(cold, repeat, setup=fresh_index)
+
+    model.get_library_files()
+    def warm(_):
+        model.get_library_files()
+    results[f"get_library_files[sin cambios] {count}"] = measure(warm, repeat)
+
+    def cached(_):
+        model.get_library_files(cached_only=True)
+    results[f"get_library_files[caché] {count}"] = measure(cached, repeat)
+
+    def reload_index():
+        return LibraryIndex(index_path)
+    def startup(index):
+        index.get_files(folder, refresh=False)
+    results[f"LibraryIndex[carga+lista] {count}"] = measure(startup, repeat, setup=reload_index)
+    return results
+
+
+def bench_search(files, count, repeat):
+    from app.search_index import LibrarySearchIndex
+    results = {}
+
+    def build(_):
+        LibrarySearchIndex(files)
+    results[f"search[construir] {count}"] = measure(build, max(1, repeat // 2))
+
+    index = LibrarySearchIndex(files)
+    for query in ('v', 'video', 'cancion 12', 'entrevista podcast 9', 'zzz sin resultados'):
+        def run(_, query=query):
+            index.search(query)
+        results[f"search['{query}'] {count}"] = measure(run, repeat)
+    return results
+
+
+def bench_reserve(folder, count, repeat, data_dir):
+    from app.library_index import LibraryIndex
+    results = {}
+    index_path = os.path.join(data_dir, f"reserve_{count}.json")
+    base = LibraryIndex(index_path)
+    base.refresh(folder)
+    calls = 200
+
+    def fresh():
+        # Índice ya cargado pero sin reservas previas
+        return LibraryIndex(index_path)
+
+    def reserve(index):
+        for _ in range(calls):
+            index.reserve_name(folder, "video_download", "mp4")
+    results[f"reserve_name x{calls} {count}"] = measure(reserve, repeat, setup=fresh, per_call=calls)
+
+    legacy_calls = 5
+    def legacy(_):
+        for _ in range(legacy_calls):
+            _legacy_unique_stem(folder, "video_download", "mp4")
+    results[f"listdir anterior x{legacy_calls} {count}"] = measure(legacy, max(1, repeat // 2), per_call=legacy_calls)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks del modelo con datos sintéticos")
+    parser.add_argument('--files', default='10000,100000', help="Tamaños de carpeta a generar")
+    parser.add_argument('--formats', type=int, default=300, help="Formatos del info dict sintético")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help="Escribir los resultados en este archivo")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="ytd-micro-")
+    data_dir = os.path.join(work_dir, "data")
+    # Datos de la app aislados del usuario: antes de importar app
+    os.environ['YTD_DATA_DIR'] = data_dir
+    results = {}
+    try:
+        from app.model import DownloaderModel
+        model = DownloaderModel(persist_queue=False)
+        results.update(bench_formats(model, args.formats, args.repeat))
+
+        for count in (int(c) for c in args.files.split(',') if c):
+            t = time.perf_counter()
+            folder = make_folder(work_dir, count)
+            print(f"Carpeta de {count} archivos generada en {time.perf_counter() - t:.1f} s", file=sys.stderr)
+            model.download_path = folder
+            results.update(bench_library(model, folder, count, args.repeat, data_dir))
+            results.update(bench_search(model.get_library_files(cached_only=True), count, args.repeat))
+            results.update(bench_reserve(folder, count, args.repeat, data_dir))
+            shutil.rmtree(folder, ignore_errors=True)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{'caso':<48}{'mejor ms':>11}{'mediana ms':>12}{'pico KB':>11}")
+    for name, r in results.items():
+        print(f"{name:<48}{r['best_ms']:>11.3f}{r['median_ms']:>12.3f}{r['peak_kb']:>11.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,158 @@
+"""Servidor HTTP local que imita los streams de YouTube para los benchmarks.
+
+Rutas:
+    /file/<bytes>/<nombre>          archivo progresivo sintético (acepta Range)
+    /dash/<bytes>/seg-<n>.m4s       segmento DASH sintético de <bytes> bytes
+    /real/<nombre>                  archivo real de la carpeta media_dir (generado con ffmpeg)
+
+Los datos sintéticos se generan en memoria a partir de un bloque fijo, así que el
+servidor no toca el disco. Con rate (bytes/s) se limita la velocidad por conexión.
+"""
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BLOCK = os.urandom(1024 * 1024)
+CHUNK = 64 * 1024
+_RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def _resolve(self):
+        parts = self.path.split('?')[0].strip('/').split('/')
+        if len(parts) == 3 and parts[0] in ('file', 'dash') and parts[1].isdigit():
+            return int(parts[1]), None
+        if len(parts) == 2 and parts[0] == 'real' and self.server.media_dir:
+            path = os.path.join(self.server.media_dir, os.path.basename(parts[1]))
+            if os.path.isfile(path):
+                return os.path.getsize(path), path
+        return None, None
+
+    def _serve(self, head):
+        size, path = self._resolve()
+        if size is None:
+            self.send_error(404)
+            return
+
+        start, end = 0, size - 1
+        match = _RANGE_RE.fullmatch(self.headers.get('Range', ''))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+
+        length = end - start + 1
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+        if head:
+            return
+
+        try:
+            if path:
+                with open(path, 'rb') as f:
+                    f.seek(start)
+                    self._send(lambda n: f.read(n), length)
+            else:
+                pos = [start]
+                self._send(lambda n: self._synthetic(pos, n), length)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    @staticmethod
+    def _synthetic(pos, n):
+        offset = pos[0] % len(BLOCK)
+        data = BLOCK[offset:offset + n]
+        pos[0] += len(data)
+        return data
+
+    def _send(self, read, length):
+        rate = self.server.rate
+        started = time.monotonic()
+        sent = 0
+        while sent < length:
+            data = read(min(CHUNK, length - sent))
+            if not data:
+                break
+            self.wfile.write(data)
+            sent += len(data)
+            if rate:
+                ahead = sent / rate - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+class MediaServer:
+    """Servidor en un hilo propio; usar como context manager o con start()/stop()"""
+
+    def __init__(self, host='127.0.0.1', port=0, media_dir=None, rate=None):
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.media_dir = media_dir
+        self.httpd.rate = rate
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def serve_in_process(ready, stop, media_dir=None, rate=None):
+    """Destino para multiprocessing: así la CPU del servidor no cuenta en el benchmark"""
+    with MediaServer(media_dir=media_dir, rate=rate) as server:
+        ready.put(server.base_url)
+        stop.wait()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Servidor de medios sintéticos para benchmarks")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--media-dir')
+    parser.add_argument('--rate', type=int, help="Límite por conexión en bytes/s")
+    args = parser.parse_args()
+    server = MediaServer(port=args.port, media_dir=args.media_dir, rate=args.rate)
+    print(f"Sirviendo en {server.base_url}")
+    server.httpd.serve_forever()
@@ -0,0 +1,155 @@
+"""Extractor de yt-dlp de mentira para los benchmarks.
+
+Las URLs tienen la forma bench://<tipo>/<bytes>/<id>:
+    prog   un solo archivo progresivo (video+audio)
+    dash   el mismo tamaño repartido en segmentos DASH (descarga por fragmentos)
+    real   video y audio reales por separado (requiere ffmpeg: mide también la fusión)
+
+install() sustituye yt_dlp.YoutubeDL por una subclase que registra el extractor
+antes que los de serie y añade hooks que anotan los tiempos de cada etapa.
+"""
+import contextlib
+import math
+import threading
+import time
+
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+SEGMENT_SIZE = 1024 * 1024
+
+
+class BenchIE(InfoExtractor):
+    IE_NAME = 'bench'
+    _VALID_URL = r'bench://(?P<kind>prog|dash|real)/(?P<size>\d+)/(?P<id>[\w-]+)'
+
+    base_url = None # Lo fija install() con la URL del servidor local
+
+    def _real_extract(self, url):
+        kind, size, video_id = self._match_valid_url(url).group('kind', 'size', 'id')
+        size = int(size)
+        base = self.base_url
+        info = {
+            'id': video_id,
+            'title': f"Bench {kind} {video_id}",
+            'duration': 60,
+        }
+
+        if kind == 'prog':
+            info['formats'] = [{
+                'format_id': 'prog', 'url': f"{base}/file/{size}/{video_id}.mp4", 'ext': 'mp4',
+                'vcodec': 'avc1.64001F', 'acodec': 'mp4a.40.2', 'height': 720, 'filesize': size,
+            }]
+        elif kind == 'dash':
+            count = max(1, math.ceil(size / SEGMENT_SIZE))
+            info['formats'] = [{
+                'format_id': 'dash', 'ext': 'mp4', 'protocol': 'http_dash_segments',
+                'url': f"{base}/dash/{SEGMENT_SIZE}/manifest.mpd",
+                'fragment_base_url': f"{base}/dash/{SEGMENT_SIZE}/",
+                'fragments': [{'path': f"seg-{i}.m4s", 'duration': 60 / count} for i in range(count)],
+                'vcodec': 'avc1.64001F', 'acodec': 'mp4a.40.2', 'height': 720,
+                'filesize': count * SEGMENT_SIZE,
+            }]
+        else:
+            info['formats'] = [
+                {'format_id': 'v', 'url': f"{base}/real/video.mp4", 'ext': 'mp4',
+                 'vcodec': 'avc1.64001F', 'acodec': 'none', 'height': 720},
+                {'format_id': 'a', 'url': f"{base}/real/audio.m4a", 'ext': 'm4a',
+                 'vcodec': 'none', 'acodec': 'mp4a.40.2'},
+            ]
+        return info
+
+
+class StageRecorder:
+    """Instantes de cada etapa por id de video (extract, download, postprocess, done)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.jobs = {}
+
+    def reset(self):
+        with self._lock:
+            self.jobs = {}
+
+    def _stamp(self, video_id, stage, first):
+        now = time.perf_counter()
+        with self._lock:
+            job = self.jobs.setdefault(video_id, {})
+            if first:
+                job.setdefault(stage, now)
+            else:
+                job[stage] = now
+
+    def begin(self, video_id, stage):
+        self._stamp(video_id, f"{stage}_start", True)
+
+    def end(self, video_id, stage):
+        self._stamp(video_id, f"{stage}_end", False)
+
+    def progress_hook(self, d):
+        video_id = (d.get('info_dict') or {}).get('id')
+        if not video_id:
+            return
+        if d['status'] == 'downloading':
+            self.begin(video_id, 'download')
+        elif d['status'] == 'finished':
+            self.end(video_id, 'download')
+
+    def postprocessor_hook(self, d):
+        video_id = (d.get('info_dict') or {}).get('id')
+        if not video_id:
+            return
+        if d['status'] == 'started':
+            self.begin(video_id, 'postprocess')
+        elif d['status'] == 'finished':
+            self.end(video_id, 'postprocess')
+
+    def stage_times(self):
+        """Duración media (s) de cada etapa entre todos los jobs"""
+        totals, counts = {}, {}
+        with self._lock:
+            jobs = list(self.jobs.values())
+        for job in jobs:
+            for stage in ('extract', 'download', 'postprocess'):
+                if f"{stage}_start" in job and f"{stage}_end" in job:
+                    totals[stage] = totals.get(stage, 0) + job[f"{stage}_end"] - job[f"{stage}_start"]
+                    counts[stage] = counts.get(stage, 0) + 1
+            # Limpieza: desde que yt-dlp termina hasta que el modelo avisa de la finalización
+            last = max((job[k] for k in ('download_end', 'postprocess_end') if k in job), default=None)
+            if last is not None and 'done_end' in job:
+                totals['cleanup'] = totals.get('cleanup', 0) + job['done_end'] - last
+                counts['cleanup'] = counts.get('cleanup', 0) + 1
+        return {stage: totals[stage] / counts[stage] for stage in totals}
+
+
+recorder = StageRecorder()
+
+
+class BenchYoutubeDL(yt_dlp.YoutubeDL):
+    def __init__(self, params=None, auto_init=True):
+        # Sin barra de progreso en consola: solo ensucia la tabla de resultados
+        super().__init__(dict(params or {}, noprogress=True), auto_init)
+        self.add_progress_hook(recorder.progress_hook)
+        self.add_postprocessor_hook(recorder.postprocessor_hook)
+
+    def add_default_info_extractors(self):
+        # Antes que los de serie: el extractor genérico acepta cualquier URL
+        self.add_info_extractor(BenchIE())
+        super().add_default_info_extractors()
+
+
+@contextlib.contextmanager
+def install(base_url):
+    """Activa el extractor de prueba mientras dura el bloque"""
+    original = yt_dlp.YoutubeDL
+    BenchIE.base_url = base_url
+    yt_dlp.YoutubeDL = BenchYoutubeDL
+    try:
+        yield recorder
+    finally:
+        yt_dlp.YoutubeDL = original
+
+
+def bench_url(kind, size, video_id):
+    return f"bench://{kind}/{size}/{video_id}"
+
@@ -1,3 +1,7 @@
+from app import startup # Primero: marca el inicio para el informe de arranque
+startup.timed_import('customtkinter')
+startup.timed_import('PIL.Image')
+startup.timed_import('app.controller')
 from app.controller import DownloaderController
 import ctypes
 
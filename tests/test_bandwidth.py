@@ -0,0 +1,103 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from app.bandwidth import BandwidthScheduler, ProgressCounter
+
+MB = 1024 * 1024
+
+
+class BandwidthSchedulerTest(unittest.TestCase):
+    def test_global_limit_is_split_evenly(self):
+        bw = BandwidthScheduler(global_limit=9 * MB)
+        for job in 'abc':
+            bw.register(job)
+        self.assertEqual(bw.current_rates(), {'a': 3 * MB, 'b': 3 * MB, 'c': 3 * MB})
+
+    def test_unused_share_goes_to_the_others(self):
+        # Water-filling: lo que no usa el trabajo limitado se reparte entre los demás
+        bw = BandwidthScheduler(global_limit=10 * MB)
+        bw.register('slow', limit=1 * MB)
+        bw.register('b')
+        bw.register('c')
+        rates = bw.current_rates()
+        self.assertEqual(rates['slow'], 1 * MB)
+        self.assertAlmostEqual(rates['b'], 4.5 * MB)
+        self.assertAlmostEqual(rates['c'], 4.5 * MB)
+
+    def test_job_limit_caps_every_share(self):
+        bw = BandwidthScheduler(global_limit=10 * MB, job_limit=2 * MB)
+        bw.register('a')
+        bw.register('b')
+        self.assertEqual(bw.current_rates(), {'a': 2 * MB, 'b': 2 * MB})
+
+    def test_set_limits_at_runtime(self):
+        bw = BandwidthScheduler()
+        bw.register('a')
+        bw.register('b')
+        self.assertEqual(bw.current_rates(), {'a': None, 'b': None})
+
+        bw.set_limits(4 * MB, None)
+        self.assertEqual(bw.current_rates(), {'a': 2 * MB, 'b': 2 * MB})
+
+        bw.unregister('b')
+        self.assertEqual(bw.current_rates(), {'a': 4 * MB})
+
+        bw.set_limits(0, 0) # 0 = sin límite
+        self.assertEqual(bw.current_rates(), {'a': None})
+
+    def test_consume_sleeps_for_the_debt(self):
+        bw = BandwidthScheduler(job_limit=1 * MB)
+        bw.register('a')
+        with mock.patch('app.bandwidth.time.sleep') as sleep:
+            bw.consume('a', MB // 4)
+        wait = sleep.call_args[0][0]
+        self.assertGreater(wait, 0.2)
+        self.assertLessEqual(wait, 0.5)
+
+    def test_consume_without_limit_never_sleeps(self):
+        bw = BandwidthScheduler()
+        bw.register('a')
+        with mock.patch('app.bandwidth.time.sleep') as sleep:
+            bw.consume('a', 500 * MB)
+            bw.consume('unknown', 500 * MB)
+        sleep.assert_not_called()
+
+
+class ProgressCounterTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder, ignore_errors=True)
+
+    def test_cumulative_bytes_become_deltas(self):
+        counter = ProgressCounter()
+        self.assertEqual(counter.delta('v.mp4', 100), 100)
+        self.assertEqual(counter.delta('v.mp4', 250), 150)
+        # Video y audio se cuentan por separado
+        self.assertEqual(counter.delta('a.m4a', 40), 40)
+
+    def test_repeated_or_backwards_hooks_charge_nothing(self):
+        counter = ProgressCounter()
+        counter.delta('v.mp4', 50 * MB)
+        self.assertEqual(counter.delta('v.mp4', 50 * MB), 0)
+        self.assertEqual(counter.delta('v.mp4', 10 * MB), 0)
+        # Se sigue contando desde el valor más reciente
+        self.assertEqual(counter.delta('v.mp4', 11 * MB), 1 * MB)
+
+    def test_resumed_part_is_not_charged(self):
+        final = os.path.join(self.folder, "video.f137.mp4")
+        with open(final + ".part", 'wb') as f:
+            f.write(b"\0" * 5000)
+        with open(os.path.join(self.folder, "video (#1).mp4.part"), 'wb') as f:
+            f.write(b"\0" * 7000) # Otro stem: no cuenta
+
+        counter = ProgressCounter(self.folder, "video")
+        # yt-dlp empieza a contar desde lo que ya estaba en el .part
+        self.assertEqual(counter.delta(final, 5000 + 1024), 1024)
+        self.assertEqual(counter.delta(os.path.join(self.folder, "video (#1).mp4"), 7000), 7000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import gc
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import warnings
+
+from app.info_cache import InfoCache
+
+
+class InfoCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder, ignore_errors=True)
+        self.cache = InfoCache(os.path.join(self.folder, "cache.sqlite3"))
+
+    def test_put_and_get(self):
+        url = "https://www.youtube.com/watch?v=abcdefghijk"
+        self.cache.put(url, {'id': 'abcdefghijk', 'title': 'Video', 'webpage_url': url})
+        info, _ = self.cache.get("https://youtu.be/abcdefghijk")
+        self.assertEqual(info['title'], 'Video')
+
+    def test_connections_are_closed(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ResourceWarning)
+            self.cache.put("https://youtu.be/abcdefghijk", {'id': 'abcdefghijk', 'title': 'Video'})
+            self.cache.get("https://youtu.be/abcdefghijk")
+            gc.collect()
+        self.assertFalse([w for w in caught if issubclass(w.category, ResourceWarning)])
+
+        with self.cache._connect() as conn:
+            pass
+        with self.assertRaises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+if __name__ == '__main__':
+    unittest.main()
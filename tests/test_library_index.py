@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from app.library_index import LibraryIndex
+
+
+class ReserveNameTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.folder = os.path.join(self.root, "downloads")
+        os.makedirs(self.folder)
+        self.index = LibraryIndex(os.path.join(self.root, "index.json"))
+
+    def _touch(self, name):
+        open(os.path.join(self.folder, name), 'w').close()
+
+    def test_reserved_names_are_unique(self):
+        self.assertEqual(self.index.reserve_name(self.folder, "foo", "mp4"), "foo")
+        self.assertEqual(self.index.reserve_name(self.folder, "foo", "mp4"), "foo (#1)")
+        self.assertEqual(self.index.reserve_name(self.folder, "foo", "mp3"), "foo")
+
+    def test_existing_files_are_skipped(self):
+        self._touch("foo.mp4")
+        self.index.refresh(self.folder)
+        self._touch("foo (#1).mp4") # Aún no está en el índice
+        self.assertEqual(self.index.reserve_name(self.folder, "foo", "mp4"), "foo (#2)")
+
+    def test_released_name_is_handed_out_again(self):
+        stem = self.index.reserve_name(self.folder, "foo", "mp4")
+        self.index.release_name(self.folder, stem, "mp4")
+        self.assertEqual(self.index.reserve_name(self.folder, "foo", "mp4"), "foo")
+
+    def test_released_suffix_is_reused(self):
+        for _ in range(3):
+            self.index.reserve_name(self.folder, "foo", "mp4")
+        self.index.release_name(self.folder, "foo (#1)", "mp4")
+        self.assertEqual(self.index.reserve_name(self.folder, "foo", "mp4"), "foo (#1)")
+        self.assertEqual(self.index.reserve_name(self.folder, "foo", "mp4"), "foo (#3)")
+
+    def test_claimed_name_is_not_reserved(self):
+        self.index.claim_name(self.folder, "foo", "mp4")
+        self.assertEqual(self.index.reserve_name(self.folder, "foo", "mp4"), "foo (#1)")
+        self.index.release_name(self.folder, "foo", "mp4")
+        self.assertEqual(self.index.reserve_name(self.folder, "foo", "mp4"), "foo")
+
+    def test_reservations_are_per_folder(self):
+        other = os.path.join(self.root, "other")
+        os.makedirs(other)
+        self.index.claim_name(self.folder, "foo", "mp4")
+        self.assertEqual(self.index.reserve_name(other, "foo", "mp4"), "foo")
+
+    def test_concurrent_reservations(self):
+        names = []
+        lock = threading.Lock()
+
+        def worker():
+            stem = self.index.reserve_name(self.folder, "foo", "mp4")
+            with lock:
+                names.append(stem)
+
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+        self.assertEqual(len(set(names)), 20)
+
+
+class AddFileTest(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.folder = os.path.join(self.root, "downloads")
+        os.makedirs(self.folder)
+        self.index = LibraryIndex(os.path.join(self.root, "index.json"))
+
+    def _touch(self, name):
+        path = os.path.join(self.folder, name)
+        open(path, 'w').close()
+        return path
+
+    def _names(self, refresh):
+        return [f['name'] for f in self.index.get_files(self.folder, refresh=refresh)]
+
+    def test_added_file_is_listed_before_a_rescan(self):
+        self._touch("a.mp4")
+        self.index.refresh(self.folder)
+        self.index.add_file(self._touch("b.mp4"))
+        self.assertEqual(self._names(refresh=False), ["a.mp4", "b.mp4"])
+
+    def test_outside_changes_still_show_up(self):
+        self._touch("a.mp4")
+        self.index.refresh(self.folder)
+        # Mientras se descargaba b.mp4 alguien borró a.mp4 y copió c.mp3
+        os.remove(os.path.join(self.folder, "a.mp4"))
+        self._touch("c.mp3")
+        self.index.add_file(self._touch("b.mp4"))
+        # Asegurar que el mtime de la carpeta avanza aunque todo pase en el mismo tick del reloj
+        st = os.stat(self.folder)
+        os.utime(self.folder, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+        self.assertEqual(self._names(refresh=True), ["b.mp4", "c.mp3"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image
+
+from app.thumbnail_loader import decode_thumbnail
+
+
+class DecodeThumbnailTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder, ignore_errors=True)
+
+    def _save(self, img, name):
+        path = os.path.join(self.folder, name)
+        img.save(path)
+        return path
+
+    def test_modes(self):
+        images = {
+            'rgb.jpg': Image.new('RGB', (1280, 720), (200, 30, 30)),
+            'rgba.png': Image.new('RGBA', (1280, 720), (0, 0, 255, 128)),
+            'palette.png': Image.new('RGB', (1280, 720), (10, 200, 10)).convert('P'),
+            'gray16.png': Image.new('I;16', (1280, 720), 30000),
+            'gray.png': Image.new('L', (1280, 720), 128),
+        }
+        for name, img in images.items():
+            with self.subTest(name=name):
+                thumb = decode_thumbnail(self._save(img, name), (96, 54))
+                self.assertEqual(thumb.size, (96, 54))
+                self.assertIn(thumb.mode, ('RGB', 'RGBA'))
+
+    def test_small_image_is_upscaled(self):
+        path = self._save(Image.new('P', (40, 30)), 'small.png')
+        self.assertEqual(decode_thumbnail(path, (96, 54)).size, (96, 54))
+
+
+if __name__ == '__main__':
+    unittest.main()